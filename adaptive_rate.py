@@ -0,0 +1,76 @@
+import cv2
+
+
+# adaptive inference load for the game loop
+#   watches the measured frame time and steps the hand tracking workload down when the loop
+#   is slower than the target frame rate, and back up when there is headroom:
+#     level 0 .. len(scales)-1   run hand tracking every frame on a frame scaled by scales[level]
+#     higher levels              smallest scale, and hand tracking only every (skip+1)th frame
+#   drawing and game updates still run every frame; in between inference frames the caller
+#   reuses the previous result.
+#
+#   controller = RateController(targetFps=24)
+#   controller.update(deltaTime)
+#   if controller.shouldInfer():
+#       result = tracker.track(controller.resize(frame))
+
+class RateController:
+
+    def __init__(self, targetFps=24, scales=(1.0, 0.75, 0.5), maxSkip=3, smoothing=0.1, holdFrames=30, verbose=True):
+        self.targetTime = 1.0 / targetFps
+        self.scales = scales
+        self.maxLevel = len(scales) - 1 + maxSkip
+        self.smoothing = smoothing
+        self.holdFrames = holdFrames
+        self.verbose = verbose
+        self.level = 0
+        self.wait = holdFrames
+        self.averageTime = self.targetTime
+        self.frameCount = 0
+
+    @property
+    def scale(self):
+        return self.scales[min(self.level, len(self.scales) - 1)]
+
+    @property
+    def skip(self):
+        return max(0, self.level - (len(self.scales) - 1))
+
+    # call once per frame with the measured frame time in seconds
+    def update(self, deltaTime):
+        self.frameCount += 1
+        self.averageTime += self.smoothing * (deltaTime - self.averageTime)
+
+        # after a change, give the average time to settle before deciding again
+        self.wait -= 1
+        if self.wait > 0:
+            return
+
+        # step down quickly when too slow, step back up only with clear headroom
+        if self.averageTime > self.targetTime * 1.1 and self.level < self.maxLevel:
+            self.setLevel(self.level + 1)
+        elif self.averageTime < self.targetTime * 0.6 and self.level > 0:
+            self.setLevel(self.level - 1)
+
+    def setLevel(self, level):
+        self.level = level
+        self.wait = self.holdFrames
+        if self.verbose:
+            print("%.1f fps -> %s" % (1.0 / self.averageTime, self.describe()))
+
+    # True on frames that should run hand tracking
+    def shouldInfer(self):
+        return self.frameCount % (self.skip + 1) == 0
+
+    # frame to hand to hand tracking. MediaPipe landmarks are normalized (0..1),
+    # so they can be drawn on the full size frame unchanged
+    def resize(self, frame):
+        if self.scale >= 1.0:
+            return frame
+        return cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def describe(self):
+        text = "inference at %d%%" % round(self.scale * 100)
+        if self.skip > 0:
+            text += ", every %d frames" % (self.skip + 1)
+        return text
@@ -0,0 +1,189 @@
+import numpy as np
+import cv2
+import os
+import sys
+import csv
+import time
+import argparse
+import multiprocessing
+from collections import defaultdict
+from asl_rules import determineLetter
+from hand_mirror import mirrorResult
+
+
+# headless letter classifier for labeled still images, no camera needed
+#
+#   python asl-batch.py dataset/                         every image below dataset/
+#   python asl-batch.py manifest.csv                     "path,label" per line (label optional)
+#   python asl-batch.py dataset/ --workers 8 --output results.csv --matrix confusion.csv
+#
+# the true letter of an image is taken from the manifest, else from its folder name
+# (dataset/A/0001.jpg) or a file name prefix (A_0001.jpg, A-0001.jpg).
+# every worker process runs its own MediaPipe Hands in static image mode; results are
+# written to the CSV file as they arrive, and a confusion matrix is printed at the end.
+
+IMAGE_TYPES = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+NO_HAND = "-"
+
+
+# true letter from a path: single letter folder name, else single letter file name prefix
+def labelFromPath(path):
+    folder = os.path.basename(os.path.dirname(path))
+    if len(folder) == 1 and folder.isalpha():
+        return folder.upper()
+    name = os.path.basename(path)
+    if len(name) > 2 and name[0].isalpha() and name[1] in "_- .":
+        return name[0].upper()
+    return ""
+
+def readManifest(path):
+    items = []
+    base = os.path.dirname(path)
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if not row or row[0].startswith("#") or row[0] == "path":
+                continue
+            imagePath = row[0] if os.path.isabs(row[0]) else os.path.join(base, row[0])
+            label = row[1].strip().upper() if len(row) > 1 and row[1].strip() else labelFromPath(imagePath)
+            items.append((imagePath, label))
+    return items
+
+# (image path, true letter) for every image in the given directories and manifests
+def collectImages(inputs):
+    items = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                subfolders.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_TYPES):
+                        imagePath = os.path.join(folder, name)
+                        items.append((imagePath, labelFromPath(imagePath)))
+        elif path.lower().endswith(IMAGE_TYPES):
+            items.append((path, labelFromPath(path)))
+        else:
+            items.extend(readManifest(path))
+    return items
+
+
+# worker process state: one MediaPipe Hands per process, created once by the pool initializer
+hand = None
+mirror = "pixels"
+
+def startWorker(mirrorMode):
+    global hand, mirror
+    import mediapipe as mp
+    hand = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1)
+    mirror = mirrorMode
+
+# one image -> (path, true letter, letter, handedness, handedness score, milliseconds)
+def classifyImage(item):
+    (path, label) = item
+    start = time.perf_counter()
+    image = cv2.imread(path)
+    if image is None:
+        return (path, label, "", "", "", "unreadable")
+    # the rules are written for the mirrored webcam view
+    if mirror == "pixels":
+        image = cv2.flip(image, 1)
+    result = hand.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    if mirror == "landmarks":
+        mirrorResult(result)
+    letter = NO_HAND
+    hand_type = ""
+    score = ""
+    if result.multi_hand_landmarks:
+        classification = result.multi_handedness[0].classification[0]
+        hand_type = classification.label
+        score = "%.3f" % classification.score
+        letter = determineLetter(result.multi_hand_landmarks[0].landmark, hand_type)
+    return (path, label, letter, hand_type, score, "%.1f" % ((time.perf_counter() - start) * 1000))
+
+
+# rows: true letter, columns: recognized letter ("?" unknown, "-" no hand found)
+def confusionMatrix(counts):
+    labels = sorted(set(label for (label, letter) in counts))
+    letters = sorted(set(letter for (label, letter) in counts), key=lambda letter: (not letter.isalpha(), letter))
+    matrix = np.zeros((len(labels), len(letters)), int)
+    for (label, letter), count in counts.items():
+        matrix[labels.index(label), letters.index(letter)] = count
+    return (labels, letters, matrix)
+
+def printMatrix(labels, letters, matrix):
+    print("true \\ found " + "".join("%5s" % letter for letter in letters) + "   total  correct")
+    for row, label in enumerate(labels):
+        total = matrix[row].sum()
+        correct = matrix[row, letters.index(label)] if label in letters else 0
+        print("%-12s " % (label or "(none)") + "".join("%5d" % count if count else "    ." for count in matrix[row]) +
+              "  %6d  %6.1f%%" % (total, 100.0 * correct / max(total, 1)))
+
+def saveMatrix(path, labels, letters, matrix):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["true"] + letters)
+        for row, label in enumerate(labels):
+            writer.writerow([label] + list(matrix[row]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="classify labeled still images with MediaPipe Hands and determineLetter")
+    parser.add_argument("inputs", nargs="+", help="image directories, image files, or manifest files (path,label per line)")
+    parser.add_argument("--output", default="asl-batch-results.csv", help="per-image results (CSV)")
+    parser.add_argument("--matrix", help="also save the confusion matrix to this CSV file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=16, help="images handed to a worker at a time")
+    parser.add_argument("--mirror", choices=["pixels", "landmarks", "none"], default="pixels",
+                        help="mirror the images like the webcam apps (pixels), mirror only the found landmarks "
+                             "(landmarks, skips the image flip), or not at all (none, images are already mirrored)")
+    args = parser.parse_args()
+
+    # fail here rather than in every worker: the pool restarts workers whose initializer raises
+    import mediapipe as mp
+    mp.solutions.hands
+
+    items = collectImages(args.inputs)
+    if not items:
+        print("no images found")
+        sys.exit(1)
+    print("classifying %d images with %d workers" % (len(items), args.workers))
+
+    counts = defaultdict(int)
+    unreadable = 0
+    start = time.perf_counter()
+    with open(args.output, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["path", "label", "letter", "handedness", "score", "ms"])
+        with multiprocessing.Pool(args.workers, initializer=startWorker, initargs=(args.mirror,)) as pool:
+            # unordered: rows are written as soon as any worker finishes, so a slow image never stalls the rest
+            for done, row in enumerate(pool.imap_unordered(classifyImage, items, args.chunksize), 1):
+                writer.writerow(row)
+                if row[5] == "unreadable":
+                    unreadable += 1
+                else:
+                    counts[(row[1], row[2])] += 1
+                if done % 500 == 0:
+                    file.flush()
+                    elapsed = time.perf_counter() - start
+                    print("  %d / %d images, %.0f images/sec" % (done, len(items), done / elapsed))
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("%d images in %.1f s, %.0f images/sec" % (len(items), elapsed, len(items) / elapsed))
+    if unreadable:
+        print("%d images could not be read" % unreadable)
+    print("results saved to", args.output)
+    if counts:
+        (labels, letters, matrix) = confusionMatrix(counts)
+        correct = sum(count for (label, letter), count in counts.items() if label == letter)
+        labeled = sum(count for (label, letter), count in counts.items() if label)
+        if labeled:
+            print("accuracy: %.1f%% of %d labeled images" % (100.0 * correct / labeled, labeled))
+        print()
+        printMatrix(labels, letters, matrix)
+        if args.matrix:
+            saveMatrix(args.matrix, labels, letters, matrix)
+            print("confusion matrix saved to", args.matrix)
+
+
+if __name__ == "__main__":
+    main()
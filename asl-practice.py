@@ -1,9 +1,14 @@
-import numpy as np
 import cv2
 import sys
 import mediapipe as mp
-from enum import Enum
-import math
+from asl_tracking import LetterTracker
+from asl_pipeline import HandPipeline
+from frame_timing import FrameTimer
+from frame_buffers import FrameBuffers
+from asl_recording import LandmarkRecorder
+from hand_roi import RoiHandTracker
+from motion_gate import MotionGate
+from text_sprites import TextSpriteCache
 import random
 import time
 
@@ -16,313 +21,11 @@ import time
 fontFamily    = cv2.FONT_HERSHEY_SIMPLEX
 fontScale     = 4
 fontThickness = 4
+# each string is rendered once and then blended from a cache (see text_sprites.py)
+textSprites = TextSpriteCache(fontFamily, fontScale, fontThickness,
+                              [((0,0,0), fontThickness*8), ((255,255,255), fontThickness*2)])
 def displayText(frame, text, position):
-    (w,h), _ = cv2.getTextSize(text, fontFamily, fontScale, fontThickness)
-    (x,y) = (position[0] - int(w/2), position[1] + int(h/2))
-    frame = cv2.putText(frame, text, (x,y), fontFamily, fontScale, (0,0,0), fontThickness*8, cv2.LINE_AA)
-    frame = cv2.putText(frame, text, (x,y), fontFamily, fontScale, (255,255,255), fontThickness*2, cv2.LINE_AA)
-
-# helper math functions
-
-def slope(point1, point2):
-    return (point2.y - point1.y) / (point2.x - point1.x)
-
-def angle(point1, point2):
-    return math.atan2(point2.y - point1.y, point2.x - point1.x)
-
-def approx(value, target, range):
-    return (target - range <= value) and (value <= target + range) 
-
-def distance(point1, point2):
-    return math.sqrt((point2.y - point1.y) * (point2.y - point1.y) + (point2.x - point1.x) * (point2.x - point1.x))
-
-class Finger(Enum):
-    STRAIGHT = 1
-    ANGLE    = 2
-    UP       = 3
-    DOWN     = 4
-    LEFT     = 5
-    RIGHT    = 6
-    BENT     = 7
-    PALM     = 8
-    STRAIGHT_UP    = 9
-    STRAIGHT_DOWN  = 10
-    STRAIGHT_LEFT  = 11
-    STRAIGHT_RIGHT = 12
-    UP_OR_RIGHT   = 13
-    UP_OR_LEFT    = 14
-    DOWN_OR_RIGHT = 15
-    DOWN_OR_LEFT  = 16
-    HAND_FRONT    = 17
-    BENT_OR_PALM  = 18
-    STRAIGHT_LEFT_OR_RIGHT = 19
-
-
-# finger 0 is thumb, finger 1 is index, etc.
-def analyzeFinger(fingerIndex, fingerConfig, landmark):
-
-    # handle array of finger index values
-    if type(fingerIndex) == list:
-        for i in fingerIndex:
-            if not analyzeFinger(i, fingerConfig, landmark):
-                return False
-        return True
-
-    # i: joint index.
-    i = 1 + 4 * fingerIndex
-    if fingerConfig == Finger.STRAIGHT:
-        angle1 = angle(landmark[i+0], landmark[i+1]) + 6.28
-        angle2 = angle(landmark[i+1], landmark[i+2]) + 6.28
-        angle3 = angle(landmark[i+2], landmark[i+3]) + 6.28
-        range = math.radians(30)
-        return (approx(angle1, angle2, range) or approx(angle1 + 2*math.pi, angle2, range) or approx(angle1, angle2 + 2*math.pi, range)) \
-           and (approx(angle2, angle3, range) or approx(angle2 + 2*math.pi, angle3, range) or approx(angle2, angle3 + 2*math.pi, range))
-    # finger tip angle
-    elif fingerConfig == Finger.ANGLE:
-        return angle(landmark[i+2], landmark[i+3])
-    elif fingerConfig == Finger.UP:
-        a = angle(landmark[i+2], landmark[i+3])
-        return -3 * 3.14 / 4 < a and a < -1 * 3.14 / 4
-    elif fingerConfig == Finger.DOWN:
-        a = angle(landmark[i+2], landmark[i+3])
-        return 1 * 3.14 / 4 < a and a < 3 * 3.14 / 4
-    elif fingerConfig == Finger.LEFT:
-        a = angle(landmark[i+2], landmark[i+3])
-        return a < -3 * 3.1415926 / 4 or a > 3 * 3.1415926 / 4
-    elif fingerConfig == Finger.RIGHT:
-        a = angle(landmark[i+2], landmark[i+3])
-        return -1 * 3.14 / 4 < a and a < 1 * 3.14 / 4
-    # assumes hand direction up
-    elif fingerConfig == Finger.BENT:
-        return (landmark[i+3].y > landmark[i+2].y) and (landmark[i+3].y < landmark[i+0].y)
-    # assumes hand direction up
-    elif fingerConfig == Finger.PALM:
-        return landmark[i+3].y > landmark[i+0].y
-    elif fingerConfig == Finger.BENT_OR_PALM: # THIS CAN BE KIND OF MEANINGLESS FROM THE SIDE VIEW - STRAIGHT CAN REGISTER AS PALM IF POINTING SLIGHTLY DOWN
-        return analyzeFinger(fingerIndex, Finger.BENT, landmark) \
-           or analyzeFinger(fingerIndex, Finger.PALM, landmark)
-    elif fingerConfig == Finger.STRAIGHT_UP:
-        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
-           and analyzeFinger(fingerIndex, Finger.UP, landmark)
-    elif fingerConfig == Finger.STRAIGHT_LEFT:
-        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
-           and analyzeFinger(fingerIndex, Finger.LEFT, landmark)
-    elif fingerConfig == Finger.STRAIGHT_DOWN:
-        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
-           and analyzeFinger(fingerIndex, Finger.DOWN, landmark)
-    elif fingerConfig == Finger.STRAIGHT_RIGHT:
-        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
-           and analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
-    elif fingerConfig == Finger.STRAIGHT_LEFT_OR_RIGHT:
-        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
-           and (analyzeFinger(fingerIndex, Finger.LEFT, landmark) or analyzeFinger(fingerIndex, Finger.RIGHT, landmark))
-    elif fingerConfig == Finger.UP_OR_LEFT:
-        return analyzeFinger(fingerIndex, Finger.UP, landmark) \
-            or analyzeFinger(fingerIndex, Finger.LEFT, landmark)
-    elif fingerConfig == Finger.UP_OR_RIGHT:
-        return analyzeFinger(fingerIndex, Finger.UP, landmark) \
-            or analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
-    elif fingerConfig == Finger.DOWN_OR_LEFT:
-        return analyzeFinger(fingerIndex, Finger.DOWN, landmark) \
-            or analyzeFinger(fingerIndex, Finger.LEFT, landmark)
-    elif fingerConfig == Finger.DOWN_OR_RIGHT:
-        return analyzeFinger(fingerIndex, Finger.DOWN, landmark) \
-            or analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
-    else:
-        return None
-
-
-def determineLetter(landmark, hand_type):
-    right_hand = (hand_type == "Right")
-    left_hand  = (hand_type == "Left")
-    
-    # the "fist" letters: A, T, N, M, S
-
-    if analyzeFinger(0, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
-        and (right_hand and landmark[4].x < landmark[6].x or left_hand and landmark[4].x > landmark[6].x) \
-        and (right_hand and landmark[12].x > landmark[5].x or left_hand and landmark[12].x < landmark[5].x):
-        return "A" # thumb to correct side of index joint AND palm facing forward (TODO: flat w.r.t. screen?)
-    elif analyzeFinger(0, Finger.UP, landmark) \
-        and landmark[4].y < landmark[16].y \
-         and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
-       and (right_hand and landmark[6].x  < landmark[4].x and landmark[4].x < landmark[10].x or \
-              left_hand and landmark[10].x < landmark[4].x and landmark[4].x < landmark[6].x):
-        return "T" # avoid E confusion AND thumb between correct digits
-    elif (right_hand and analyzeFinger(0, Finger.RIGHT, landmark) and landmark[4].x > landmark[6].x or \
-           left_hand and analyzeFinger(0, Finger.LEFT, landmark)  and landmark[4].x < landmark[6].x) \
-        and not (landmark[4].y > landmark[8].y and landmark[4].y > landmark[12].y and landmark[4].y > landmark[16].y and landmark[4].y > landmark[20].y) \
-        and analyzeFinger([1,2,3,4], Finger.PALM, landmark):
-        return "S" # thumb faces correct horizontal direction AND tip is past correct digits AND thumb tip is NOT below all fingertips (avoid confusion with E)
-    elif landmark[4].y < landmark[16].y \
-        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
-        and (right_hand and landmark[10].x < landmark[4].x and landmark[4].x < landmark[14].x or \
-              left_hand and landmark[14].x < landmark[4].x and landmark[4].x < landmark[10].x) \
-        and (landmark[5].y < landmark[0].y and landmark[17].y < landmark[0].y):
-        return "N" # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
-    elif landmark[4].y < landmark[16].y \
-        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
-        and (right_hand and landmark[14].x < landmark[4].x  or \
-              left_hand and landmark[4].x  < landmark[14].x) \
-        and (landmark[5].y < landmark[0].y and landmark[17].y < landmark[0].y):
-        return "M" # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
-
-    # B
-    elif analyzeFinger([1,2,3,4], Finger.STRAIGHT_UP, landmark) \
-        and ((right_hand and landmark[4].x > landmark[8].x) or (left_hand and landmark[4].x < landmark[8].x)): # thumb tip crosses index finger
-        return "B"
-
-    # C 
-    elif (right_hand \
-        and analyzeFinger([1,2,3,4], Finger.DOWN_OR_LEFT, landmark) \
-        and analyzeFinger(0, Finger.UP_OR_LEFT, landmark) \
-        and landmark[20].x < landmark[5].x \
-        and distance(landmark[8], landmark[4]) > distance(landmark[4], landmark[3]) \
-        and landmark[8].y < landmark[4].y and landmark[20].y < landmark[4].y) or \
-        (left_hand \
-        and analyzeFinger([1,2,3,4], Finger.DOWN_OR_RIGHT, landmark) \
-        and analyzeFinger(0, Finger.UP_OR_RIGHT, landmark) \
-        and landmark[20].x > landmark[5].x \
-        and distance(landmark[8], landmark[4]) > distance(landmark[4], landmark[1]) \
-        and landmark[8].y < landmark[4].y and landmark[20].y < landmark[4].y ):
-        return "C" # very much turned to the side AND large+ gap between index tip and thumb tip AND all finger tips above thumb tip
-        
-        # TODO: the DL quadrant, rather than DOWN_OR_LEFT half-plane
-
-    elif analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger(2, Finger.PALM, landmark) \
-        and analyzeFinger(3, Finger.PALM, landmark) \
-        and analyzeFinger(4, Finger.PALM, landmark) \
-        and (right_hand and landmark[4].x > landmark[8].x or left_hand and landmark[4].x < landmark[8].x): # thumb tip crosses index finger # LEFT D confused with I
-        return "D"
-    elif (landmark[4].y > landmark[8].y and landmark[4].y > landmark[12].y and landmark[4].y > landmark[16].y and landmark[4].y > landmark[20].y) \
-        and (analyzeFinger(1, Finger.PALM, landmark)) \
-        and (analyzeFinger(2, Finger.PALM, landmark)) \
-        and (analyzeFinger(3, Finger.PALM, landmark)) \
-        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)) \
-        and (right_hand and analyzeFinger(0, Finger.RIGHT, landmark) or left_hand and analyzeFinger(0, Finger.LEFT, landmark)) \
-        and (right_hand and landmark[12].x > landmark[5].x and landmark[12].x < landmark[13].x or left_hand and landmark[12].x < landmark[5].x and landmark[12].x > landmark[13].x) \
-        and (right_hand and landmark[4].x > landmark[12].x or left_hand and landmark[4].x < landmark[12].x) \
-        and (landmark[0].y > landmark[5].y and landmark[0].y > landmark[17].y):
-        return "E" # thumb is below fingertips (avoid T/N/M confusion) AND thumb is correct direction
-        # AND palm facing forward (not turned to *either* side) AND thumb far in towards the palm
-        # AND hand not oriented down
-        # NOTE: requiring all palm, to distinguish from "X". 
-    elif analyzeFinger([2,3,4], Finger.STRAIGHT_UP, landmark) \
-        and not analyzeFinger(1, Finger.STRAIGHT, landmark): # no condition on thumb, too restrictive
-        return "F" # TODO: add parallel condition on fingers 2/3/4? closeness of 0/1? 
-    elif analyzeFinger(1, Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
-        and not analyzeFinger(2, Finger.STRAIGHT, landmark) \
-        and not analyzeFinger(3, Finger.STRAIGHT, landmark) \
-        and not analyzeFinger(4, Finger.STRAIGHT, landmark) \
-        and landmark[4].y > landmark[8].y: # avoid "gun" gesture recognized as "G"
-        return "G"
-    elif analyzeFinger([1,2], Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
-        and not analyzeFinger(3, Finger.STRAIGHT, landmark) \
-        and not analyzeFinger(4, Finger.STRAIGHT, landmark) \
-        and landmark[4].y > landmark[8].y: # avoid "gun" gesture recognized as "H"
-        return "H"                                        # TODO: small angle between fingers, similar to U vs V.... write a "angle_approx" function ????
-    elif analyzeFinger([1,2,3], Finger.PALM, landmark) \
-        and analyzeFinger(4, Finger.STRAIGHT_UP, landmark) \
-        and ((right_hand and landmark[8].x < landmark[4].x and landmark[4].x < landmark[20].x) or (left_hand and landmark[20].x < landmark[4].x and landmark[4].x < landmark[8].x)):
-        return "I" # thump tip between index and pinky tip
-    # K
-    elif (right_hand and landmark[5].x < landmark[4].x and landmark[4].x < landmark[9].x or \
-           left_hand and landmark[9].x < landmark[4].x and landmark[4].x < landmark[5].x) \
-        and landmark[4].y < landmark[5].y \
-        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) >= math.radians(10) \
-        and analyzeFinger([1,2], Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger([3,4], Finger.BENT_OR_PALM, landmark):
-        return "K" # thumb tip is between correct joints AND above joints AND fingers apart at angle (like "V")
-        # TODO: FINGER TIPS NOT CROSSED as in "R" (also do for U, V?)
-    # L
-    elif (right_hand and analyzeFinger(0, Finger.LEFT, landmark) or left_hand and analyzeFinger(0, Finger.RIGHT, landmark)) \
-        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger([2,3,4], Finger.PALM, landmark):
-        return "L"
-    # above: M, N
-    # O
-    elif (right_hand \
-        and analyzeFinger(1, Finger.DOWN_OR_LEFT, landmark) \
-        and analyzeFinger(2, Finger.DOWN_OR_LEFT, landmark) \
-        and analyzeFinger(3, Finger.DOWN_OR_LEFT, landmark) \
-        and analyzeFinger(4, Finger.DOWN_OR_LEFT, landmark) \
-        and analyzeFinger(0, Finger.UP_OR_LEFT, landmark) \
-        and landmark[20].x < landmark[5].x \
-        and distance(landmark[8], landmark[4]) < distance(landmark[4], landmark[3])) or \
-        (left_hand \
-        and analyzeFinger(1, Finger.DOWN_OR_RIGHT, landmark) \
-        and analyzeFinger(2, Finger.DOWN_OR_RIGHT, landmark) \
-        and analyzeFinger(3, Finger.DOWN_OR_RIGHT, landmark) \
-        and analyzeFinger(4, Finger.DOWN_OR_RIGHT, landmark) \
-        and analyzeFinger(0, Finger.UP_OR_RIGHT, landmark) \
-        and landmark[20].x > landmark[5].x \
-        and distance(landmark[8], landmark[4]) < distance(landmark[4], landmark[3]) ): # TODO: distinguish from "O"
-        return "O" # very much turned to the side AND *small* gap between index tip and thumb tip
-    # P
-    elif analyzeFinger(1, Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
-        and analyzeFinger(2, Finger.STRAIGHT_DOWN, landmark):
-        return "P"
-    # Q
-    elif analyzeFinger(0, Finger.DOWN, landmark) \
-        and analyzeFinger(1, Finger.STRAIGHT_DOWN, landmark) \
-        and not analyzeFinger(2, Finger.STRAIGHT, landmark):
-        return "Q"
-    # R
-    elif (right_hand and landmark[8].x > landmark[12].x and landmark[4].x > landmark[12].x or left_hand and landmark[8].x < landmark[12].x and landmark[4].x < landmark[12].x ) \
-        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark)) \
-        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
-        return "R" # index tip past middle tip AND thumb tip past middle tip 
-    # above: S, T
-    # U
-    elif (right_hand and landmark[4].x > landmark[5].x or left_hand and landmark[4].x < landmark[5].x) \
-        and (landmark[4].y > landmark[5].y) \
-        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
-        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) < math.radians(10) \
-        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark))\
-        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
-        return "U" # thumb tip to the side and below certain joint AND small angle
-    # V
-    elif (right_hand and landmark[4].x > landmark[5].x or left_hand and landmark[4].x < landmark[5].x) \
-        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
-        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) >= math.radians(10) \
-        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark)) \
-        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
-        return "V"  # thumb tip to the side and below certain joint AND large* angle
-    # W
-    elif (right_hand and landmark[4].x > landmark[9].x or left_hand and landmark[4].x < landmark[9].x) \
-        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
-        and analyzeFinger(3, Finger.STRAIGHT_UP, landmark) \
-        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
-        return "W" 
-    # X
-    elif (right_hand and landmark[4].x > landmark[8].x or left_hand and landmark[4].x < landmark[8].x) \
-        and analyzeFinger(1, Finger.BENT, landmark) and not analyzeFinger(1, Finger.PALM, landmark) \
-        and analyzeFinger(2, Finger.PALM, landmark) \
-        and analyzeFinger(3, Finger.PALM, landmark) \
-        and analyzeFinger(4, Finger.PALM, landmark):
-        return "X"
-    # Y
-    elif analyzeFinger(0, Finger.STRAIGHT, landmark) \
-        and analyzeFinger(1, Finger.PALM, landmark) \
-        and analyzeFinger(2, Finger.PALM, landmark) \
-        and analyzeFinger(3, Finger.PALM, landmark) \
-        and analyzeFinger(4, Finger.STRAIGHT, landmark) \
-        and (right_hand and landmark[12].x > landmark[5].x or left_hand and landmark[12].x < landmark[5].x) \
-        and (landmark[0].y > landmark[5].y and landmark[0].y > landmark[17].y):
-        return "Y" # AND palm facing forwards AND palm not oriented down
-    # Z
-    elif analyzeFinger(1, Finger.STRAIGHT_DOWN, landmark) \
-        and analyzeFinger(2, Finger.BENT_OR_PALM, landmark) \
-        and analyzeFinger(3, Finger.BENT_OR_PALM, landmark) \
-        and analyzeFinger(4, Finger.BENT_OR_PALM, landmark) \
-        and landmark[4].y > landmark[0].y:
-        return "Z" # index finger tip below wrist - overall hand orientation is down ---- TODO: fix confusion with E, add another condition to E for "upright"
-    else:
-        return "?"
+    textSprites.draw(frame, text, position)
 
 
 print("running webcam app")
@@ -344,11 +47,57 @@ screen_height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
 mp_hands = mp.solutions.hands
 hand = mp_hands.Hands()
 
+# region-of-interest tracking: once a hand is found, only a crop around it is processed
+# (full frame again when the hand is lost, see hand_roi.py)
+roiTracking = False
+handTracker = RoiHandTracker(hand, mp_hands.Hands(static_image_mode=True)) if roiTracking else hand
+
 mp_drawing = mp.solutions.drawing_utils
 
 if not cap.isOpened():
     print("Error opening video")
 
+# per-stage timing: set to True for an FPS / latency overlay (H key toggles it)
+# and a per-frame trace saved on exit (see frame_timing.py)
+timing = False
+timer = FrameTimer(enabled=timing)
+
+# reused frame arrays for capture, mirroring and color conversion (see frame_buffers.py)
+buffers = FrameBuffers()
+
+# recording: set to a file name (e.g. "session.aslr") to save the hand landmark stream,
+# which asl-replay.py can play back without a camera
+recording = None
+recorder = LandmarkRecorder(recording) if recording else None
+
+# temporal smoothing: the letter is voted over the last few frames, per hand, so single-frame
+# flickers neither score nor miss; while a stable hand holds still, classification is skipped
+# (see letter_smoothing.py)
+smoothing = False
+
+# multi-hand mode: every detected hand is classified (one feature pass for all hands, see classifyHands),
+# and all letters are shown. otherwise only the first hand is used
+multiHand = False
+
+# landmark mirroring: hand tracking runs on the camera frame as captured, and the landmarks and
+# handedness are mirrored afterwards (see hand_mirror.py); pixels are only flipped for display
+mirrorLandmarks = False
+
+# motion gate: skip hand tracking while nothing moves in front of the camera and no hand is in view,
+# and slow the loop down while idle (see motion_gate.py)
+motionGating = False
+motionGate = MotionGate() if motionGating else None
+
+# hand tracking and letter classification with the switches above (see asl_tracking.py)
+tracker = LetterTracker(handTracker, timer, buffers, multiHand=multiHand, smoothing=smoothing,
+                        mirrorLandmarks=mirrorLandmarks, motionGate=motionGate, recorder=recorder)
+
+# pipelined mode: capture and hand tracking run on their own threads (see asl_pipeline.py),
+# the screen updates at camera rate using the newest available hand tracking result
+pipelined = False
+if pipelined:
+    pipeline = HandPipeline(cap, tracker.trackCaptured, empty=([], [])).start()
+
 
 # initialize time variables
 elapsedTime = 0
@@ -400,8 +149,14 @@ missed_display = "---"
 
 while game_running:
 
+    timer.newFrame()
+
     # note: frames loaded in BGR order
-    success, frame = cap.read()
+    if pipelined:
+        success, frame, captureTime = pipeline.readFrame()
+    else:
+        success, frame = buffers.read(cap)
+    timer.mark("capture")
     
     if not success:
         cap.release()
@@ -409,28 +164,36 @@ while game_running:
         sys.exit()
 
     # reflect across axis 0 (x-axis)
-    frame = cv2.flip(frame, 1)
-    RGB_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = hand.process(RGB_frame)
-    summary = "[ ]"
+    camera_frame = frame
+    frame = buffers.flip(frame)
+    timer.mark("flip")
+    tracking_frame = camera_frame if mirrorLandmarks else frame
+
+    if pipelined:
+        (hand_list, letters) = pipeline.latestResult()
+    else:
+        (hand_list, letters) = tracker.track(tracking_frame)
 
-    if result.multi_hand_landmarks:
-        hand_landmarks = result.multi_hand_landmarks[0] # just first hand
+    for hand_landmarks in hand_list:
         mp_drawing.draw_landmarks(frame, hand_landmarks,  mp_hands.HAND_CONNECTIONS)
-        landmark = result.multi_hand_landmarks[0].landmark
-        hand_type = result.multi_handedness[0].classification[0].label # "Left" or "Right"
-        summary = determineLetter(result.multi_hand_landmarks[0].landmark, hand_type)
-        # summary = analyzeFinger(1, Finger.HAND_FRONT, landmark)
-        summary = str(summary)
 
     # draw text on image
+    summary = " ".join(letters) if letters else "[ ]"
     displayText(frame, summary, (960//2,540//2) )
 
    
 
+    timer.mark("draw")
+    timer.drawHud(frame)
+
     cv2.imshow("press Q to quit", frame)
+    key = cv2.waitKey(motionGate.waitTime() if motionGate else 1)
+    timer.mark("imshow")
+
+    if key == ord("h"):
+        timer.toggleHud()
 
-    if cv2.waitKey(1) == ord("q"):
+    if key == ord("q"):
         game_running = False
         quit_pressed = True
 
@@ -438,6 +201,15 @@ while game_running:
         game_running = False
         quit_pressed = True       
 
+if pipelined:
+    pipeline.stop()
+
+if recorder:
+    recorder.close()
+
+timer.printSummary()
+timer.save("asl-practice-timing.csv")
+
 cap.release()
 cv2.destroyAllWindows()
 
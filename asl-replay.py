@@ -0,0 +1,143 @@
+import numpy as np
+import cv2
+import time
+import argparse
+from collections import defaultdict
+from asl_rules import determineLetter, handKeys
+from asl_recording import LandmarkRecorder, readRecording
+from letter_smoothing import LetterSmoother
+from hand_mirror import mirrorResult
+
+
+# replay / benchmark for the letter classifier, no camera needed
+#
+#   python asl-replay.py session.aslr                  recorded landmark stream
+#   python asl-replay.py clip.mp4 --save clip.aslr     video file (runs MediaPipe once, optionally saves the landmarks)
+#   python asl-replay.py session.aslr --repeat 20      repeat for steadier timing
+#
+# recordings are made with the "recording" switch in asl-game.py / asl-practice.py.
+# reports frames per second, determineLetter time per letter, and the letter sequence.
+
+parser = argparse.ArgumentParser(description="replay recorded hand landmarks through determineLetter")
+parser.add_argument("inputs", nargs="+", help="landmark recordings (.aslr) or video files")
+parser.add_argument("--repeat", type=int, default=1, help="classify every recording this many times")
+parser.add_argument("--save", help="save the landmarks found in a video file to this recording (one input only)")
+parser.add_argument("--all-hands", action="store_true", help="classify every hand, not just the first one")
+parser.add_argument("--smooth", action="store_true", help="vote letters over recent frames per hand (letter_smoothing.py)")
+parser.add_argument("--mirror-landmarks", action="store_true", help="video files: track hands in the unflipped frames and mirror the landmarks")
+parser.add_argument("--quiet", action="store_true", help="do not print the letter sequence")
+args = parser.parse_args()
+if args.save and len(args.inputs) > 1:
+    # one recording per run: several videos would overwrite each other's landmarks
+    parser.error("--save takes a single video file as input")
+
+
+# landmark frames from a video file, mirrored like the webcam apps
+def videoFrames(path, recorder=None):
+    import mediapipe as mp
+    hand = mp.solutions.hands.Hands()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print("Error opening video", path)
+        return []
+    frames = []
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+        if args.mirror_landmarks:
+            result = mirrorResult(hand.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        else:
+            frame = cv2.flip(frame, 1)
+            result = hand.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        timestamp = len(frames) / fps
+        if recorder:
+            recorder.add(result, timestamp)
+        hands = []
+        if result.multi_hand_landmarks:
+            for hand_landmarks, handedness in zip(result.multi_hand_landmarks, result.multi_handedness):
+                classification = handedness.classification[0]
+                points = np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], np.float32)
+                hands.append((classification.label, classification.score, points))
+        frames.append((timestamp, hands))
+    cap.release()
+    return frames
+
+def loadFrames(path):
+    with open(path, "rb") as file:
+        isRecording = file.read(4) == b"ASLR"
+    if isRecording:
+        return list(readRecording(path))
+    recorder = LandmarkRecorder(args.save) if args.save else None
+    print("running hand tracking on", path)
+    frames = videoFrames(path, recorder)
+    if recorder:
+        recorder.close()
+    return frames
+
+
+# hands to classify in one frame
+def selectHands(hands):
+    return hands if args.all_hands else hands[:1]
+
+
+for path in args.inputs:
+    frames = loadFrames(path)
+    handCount = sum(len(selectHands(hands)) for (timestamp, hands) in frames)
+
+    letterTimes = defaultdict(list)
+    sequence = []
+    skipped = 0
+    start = time.perf_counter()
+    for r in range(args.repeat):
+        smoothers = {}
+        for (timestamp, hands) in frames:
+            letters = []
+            selected = selectHands(hands)
+            # smoothers are keyed as in the webcam apps, so two hands with the same label stay apart
+            keys = handKeys([label for (label, score, points) in selected])
+            for (key, (label, score, points)) in zip(keys, selected):
+                if args.smooth:
+                    smoother = smoothers.setdefault(key, LetterSmoother())
+                    if smoother.canSkip(points):
+                        smoother.add(smoother.letter, score)
+                        letters.append(smoother.letter)
+                        skipped += 1
+                        continue
+                t0 = time.perf_counter()
+                letter = determineLetter(points, label)
+                letterTimes[letter].append(time.perf_counter() - t0)
+                if args.smooth:
+                    letter = smoother.add(letter, score, points)
+                letters.append(letter)
+            if args.smooth:
+                for key, smoother in smoothers.items():
+                    if key not in keys:
+                        smoother.miss()
+            if r == 0:
+                sequence.append("/".join(letters) if letters else "-")
+    elapsed = time.perf_counter() - start
+
+    totalFrames = len(frames) * args.repeat
+    print()
+    print(path)
+    print("  frames: %d  hands: %d  repeat: %d" % (len(frames), handCount, args.repeat))
+    if elapsed > 0:
+        print("  %.0f frames/sec, %.0f hands/sec" % (totalFrames / elapsed, handCount * args.repeat / elapsed))
+    if args.smooth:
+        print("  classification skipped for %d of %d hands" % (skipped, handCount * args.repeat))
+    print("  letter   count   mean us    p95 us")
+    for letter in sorted(letterTimes):
+        times = np.array(letterTimes[letter]) * 1e6
+        print("  %-6s %7d  %8.1f  %8.1f" % (letter, len(times) / args.repeat, times.mean(), np.percentile(times, 95)))
+
+    if not args.quiet:
+        # collapse runs of the same result: "A x12" means 12 consecutive frames of A
+        runs = []
+        for letter in sequence:
+            if runs and runs[-1][0] == letter:
+                runs[-1][1] += 1
+            else:
+                runs.append([letter, 1])
+        print("  sequence:", " ".join("%s x%d" % (letter, count) for (letter, count) in runs))
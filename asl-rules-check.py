@@ -0,0 +1,274 @@
+import math
+import argparse
+import numpy as np
+from collections import Counter, namedtuple
+from asl_features import Finger, analyzeFinger, distance
+from asl_rules import determineLetter, classifyHands
+
+
+# randomized check of the compiled letter rules (asl_rules.py) against the original elif cascade
+#
+#   python asl-rules-check.py                        20000 random hands, both handedness labels
+#   python asl-rules-check.py --hands 1000000 --seed 7
+#
+# every hand goes through referenceLetter (the cascade as it was in asl-game.py, one landmark at a
+# time through analyzeFinger), determineLetter (compiled plan on HandFeatures) and classifyHands
+# (stacked feature pass, two hands at a time). all three must agree; mismatches are printed and the
+# script exits with status 1. run it after changing fingerFlags or the rule compiler; a deliberate
+# change to LETTER_RULES needs the same change in referenceLetter.
+
+Point = namedtuple("Point", "x y z")
+
+
+# the letter cascade before the rules became data, kept as the reference
+def referenceLetter(landmark, hand_type):
+    right_hand = (hand_type == "Right")
+    left_hand  = (hand_type == "Left")
+
+    # the "fist" letters: A, T, N, M, S
+
+    if analyzeFinger(0, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
+        and (right_hand and landmark[4].x < landmark[6].x or left_hand and landmark[4].x > landmark[6].x) \
+        and (right_hand and landmark[12].x > landmark[5].x or left_hand and landmark[12].x < landmark[5].x):
+        return "A" # thumb to correct side of index joint AND palm facing forward (TODO: flat w.r.t. screen?)
+    elif analyzeFinger(0, Finger.UP, landmark) \
+        and landmark[4].y < landmark[16].y \
+         and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
+       and (right_hand and landmark[6].x  < landmark[4].x and landmark[4].x < landmark[10].x or \
+              left_hand and landmark[10].x < landmark[4].x and landmark[4].x < landmark[6].x):
+        return "T" # avoid E confusion AND thumb between correct digits
+    elif (right_hand and analyzeFinger(0, Finger.RIGHT, landmark) and landmark[4].x > landmark[6].x or \
+           left_hand and analyzeFinger(0, Finger.LEFT, landmark)  and landmark[4].x < landmark[6].x) \
+        and not (landmark[4].y > landmark[8].y and landmark[4].y > landmark[12].y and landmark[4].y > landmark[16].y and landmark[4].y > landmark[20].y) \
+        and analyzeFinger([1,2,3,4], Finger.PALM, landmark):
+        return "S" # thumb faces correct horizontal direction AND tip is past correct digits AND thumb tip is NOT below all fingertips (avoid confusion with E)
+    elif landmark[4].y < landmark[16].y \
+        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
+        and (right_hand and landmark[10].x < landmark[4].x and landmark[4].x < landmark[14].x or \
+              left_hand and landmark[14].x < landmark[4].x and landmark[4].x < landmark[10].x) \
+        and (landmark[5].y < landmark[0].y and landmark[17].y < landmark[0].y):
+        return "N" # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
+    elif landmark[4].y < landmark[16].y \
+        and analyzeFinger([1,2,3,4], Finger.PALM, landmark) \
+        and (right_hand and landmark[14].x < landmark[4].x  or \
+              left_hand and landmark[4].x  < landmark[14].x) \
+        and (landmark[5].y < landmark[0].y and landmark[17].y < landmark[0].y):
+        return "M" # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
+
+    # B
+    elif analyzeFinger([1,2,3,4], Finger.STRAIGHT_UP, landmark) \
+        and ((right_hand and landmark[4].x > landmark[8].x) or (left_hand and landmark[4].x < landmark[8].x)): # thumb tip crosses index finger
+        return "B"
+
+    # C
+    elif (right_hand \
+        and analyzeFinger([1,2,3,4], Finger.DOWN_OR_LEFT, landmark) \
+        and analyzeFinger(0, Finger.UP_OR_LEFT, landmark) \
+        and landmark[20].x < landmark[5].x \
+        and distance(landmark[8], landmark[4]) > distance(landmark[4], landmark[3]) \
+        and landmark[8].y < landmark[4].y and landmark[20].y < landmark[4].y) or \
+        (left_hand \
+        and analyzeFinger([1,2,3,4], Finger.DOWN_OR_RIGHT, landmark) \
+        and analyzeFinger(0, Finger.UP_OR_RIGHT, landmark) \
+        and landmark[20].x > landmark[5].x \
+        and distance(landmark[8], landmark[4]) > distance(landmark[4], landmark[1]) \
+        and landmark[8].y < landmark[4].y and landmark[20].y < landmark[4].y ):
+        return "C" # very much turned to the side AND large+ gap between index tip and thumb tip AND all finger tips above thumb tip
+
+        # TODO: the DL quadrant, rather than DOWN_OR_LEFT half-plane
+
+    elif analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger(2, Finger.PALM, landmark) \
+        and analyzeFinger(3, Finger.PALM, landmark) \
+        and analyzeFinger(4, Finger.PALM, landmark) \
+        and (right_hand and landmark[4].x > landmark[8].x or left_hand and landmark[4].x < landmark[8].x): # thumb tip crosses index finger # LEFT D confused with I
+        return "D"
+    elif (landmark[4].y > landmark[8].y and landmark[4].y > landmark[12].y and landmark[4].y > landmark[16].y and landmark[4].y > landmark[20].y) \
+        and (analyzeFinger(1, Finger.PALM, landmark)) \
+        and (analyzeFinger(2, Finger.PALM, landmark)) \
+        and (analyzeFinger(3, Finger.PALM, landmark)) \
+        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)) \
+        and (right_hand and analyzeFinger(0, Finger.RIGHT, landmark) or left_hand and analyzeFinger(0, Finger.LEFT, landmark)) \
+        and (right_hand and landmark[12].x > landmark[5].x and landmark[12].x < landmark[13].x or left_hand and landmark[12].x < landmark[5].x and landmark[12].x > landmark[13].x) \
+        and (right_hand and landmark[4].x > landmark[12].x or left_hand and landmark[4].x < landmark[12].x) \
+        and (landmark[0].y > landmark[5].y and landmark[0].y > landmark[17].y):
+        return "E" # thumb is below fingertips (avoid T/N/M confusion) AND thumb is correct direction
+        # AND palm facing forward (not turned to *either* side) AND thumb far in towards the palm
+        # AND hand not oriented down
+        # NOTE: requiring all palm, to distinguish from "X".
+    elif analyzeFinger([2,3,4], Finger.STRAIGHT_UP, landmark) \
+        and not analyzeFinger(1, Finger.STRAIGHT, landmark): # no condition on thumb, too restrictive
+        return "F" # TODO: add parallel condition on fingers 2/3/4? closeness of 0/1?
+    elif analyzeFinger(1, Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
+        and not analyzeFinger(2, Finger.STRAIGHT, landmark) \
+        and not analyzeFinger(3, Finger.STRAIGHT, landmark) \
+        and not analyzeFinger(4, Finger.STRAIGHT, landmark) \
+        and landmark[4].y > landmark[8].y: # avoid "gun" gesture recognized as "G"
+        return "G"
+    elif analyzeFinger([1,2], Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
+        and not analyzeFinger(3, Finger.STRAIGHT, landmark) \
+        and not analyzeFinger(4, Finger.STRAIGHT, landmark) \
+        and landmark[4].y > landmark[8].y: # avoid "gun" gesture recognized as "H"
+        return "H"                                        # TODO: small angle between fingers, similar to U vs V.... write a "angle_approx" function ????
+    elif analyzeFinger([1,2,3], Finger.PALM, landmark) \
+        and analyzeFinger(4, Finger.STRAIGHT_UP, landmark) \
+        and ((right_hand and landmark[8].x < landmark[4].x and landmark[4].x < landmark[20].x) or (left_hand and landmark[20].x < landmark[4].x and landmark[4].x < landmark[8].x)):
+        return "I" # thump tip between index and pinky tip
+    # K
+    elif (right_hand and landmark[5].x < landmark[4].x and landmark[4].x < landmark[9].x or \
+           left_hand and landmark[9].x < landmark[4].x and landmark[4].x < landmark[5].x) \
+        and landmark[4].y < landmark[5].y \
+        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) >= math.radians(10) \
+        and analyzeFinger([1,2], Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger([3,4], Finger.BENT_OR_PALM, landmark):
+        return "K" # thumb tip is between correct joints AND above joints AND fingers apart at angle (like "V")
+        # TODO: FINGER TIPS NOT CROSSED as in "R" (also do for U, V?)
+    # L
+    elif (right_hand and analyzeFinger(0, Finger.LEFT, landmark) or left_hand and analyzeFinger(0, Finger.RIGHT, landmark)) \
+        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger([2,3,4], Finger.PALM, landmark):
+        return "L"
+    # above: M, N
+    # O
+    elif (right_hand \
+        and analyzeFinger(1, Finger.DOWN_OR_LEFT, landmark) \
+        and analyzeFinger(2, Finger.DOWN_OR_LEFT, landmark) \
+        and analyzeFinger(3, Finger.DOWN_OR_LEFT, landmark) \
+        and analyzeFinger(4, Finger.DOWN_OR_LEFT, landmark) \
+        and analyzeFinger(0, Finger.UP_OR_LEFT, landmark) \
+        and landmark[20].x < landmark[5].x \
+        and distance(landmark[8], landmark[4]) < distance(landmark[4], landmark[3])) or \
+        (left_hand \
+        and analyzeFinger(1, Finger.DOWN_OR_RIGHT, landmark) \
+        and analyzeFinger(2, Finger.DOWN_OR_RIGHT, landmark) \
+        and analyzeFinger(3, Finger.DOWN_OR_RIGHT, landmark) \
+        and analyzeFinger(4, Finger.DOWN_OR_RIGHT, landmark) \
+        and analyzeFinger(0, Finger.UP_OR_RIGHT, landmark) \
+        and landmark[20].x > landmark[5].x \
+        and distance(landmark[8], landmark[4]) < distance(landmark[4], landmark[3]) ): # TODO: distinguish from "O"
+        return "O" # very much turned to the side AND *small* gap between index tip and thumb tip
+    # P
+    elif analyzeFinger(1, Finger.STRAIGHT_LEFT_OR_RIGHT, landmark) \
+        and analyzeFinger(2, Finger.STRAIGHT_DOWN, landmark):
+        return "P"
+    # Q
+    elif analyzeFinger(0, Finger.DOWN, landmark) \
+        and analyzeFinger(1, Finger.STRAIGHT_DOWN, landmark) \
+        and not analyzeFinger(2, Finger.STRAIGHT, landmark):
+        return "Q"
+    # R
+    elif (right_hand and landmark[8].x > landmark[12].x and landmark[4].x > landmark[12].x or left_hand and landmark[8].x < landmark[12].x and landmark[4].x < landmark[12].x ) \
+        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark)) \
+        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
+        return "R" # index tip past middle tip AND thumb tip past middle tip
+    # above: S, T
+    # U
+    elif (right_hand and landmark[4].x > landmark[5].x or left_hand and landmark[4].x < landmark[5].x) \
+        and (landmark[4].y > landmark[5].y) \
+        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
+        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) < math.radians(10) \
+        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark))\
+        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
+        return "U" # thumb tip to the side and below certain joint AND small angle
+    # V
+    elif (right_hand and landmark[4].x > landmark[5].x or left_hand and landmark[4].x < landmark[5].x) \
+        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
+        and abs( analyzeFinger(1, Finger.ANGLE, landmark) - analyzeFinger(2, Finger.ANGLE, landmark) ) >= math.radians(10) \
+        and (analyzeFinger(3, Finger.BENT_OR_PALM, landmark)) \
+        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
+        return "V"  # thumb tip to the side and below certain joint AND large* angle
+    # W
+    elif (right_hand and landmark[4].x > landmark[9].x or left_hand and landmark[4].x < landmark[9].x) \
+        and analyzeFinger(1, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger(2, Finger.STRAIGHT_UP, landmark) \
+        and analyzeFinger(3, Finger.STRAIGHT_UP, landmark) \
+        and (analyzeFinger(4, Finger.BENT_OR_PALM, landmark)):
+        return "W"
+    # X
+    elif (right_hand and landmark[4].x > landmark[8].x or left_hand and landmark[4].x < landmark[8].x) \
+        and analyzeFinger(1, Finger.BENT, landmark) and not analyzeFinger(1, Finger.PALM, landmark) \
+        and analyzeFinger(2, Finger.PALM, landmark) \
+        and analyzeFinger(3, Finger.PALM, landmark) \
+        and analyzeFinger(4, Finger.PALM, landmark):
+        return "X"
+    # Y
+    elif analyzeFinger(0, Finger.STRAIGHT, landmark) \
+        and analyzeFinger(1, Finger.PALM, landmark) \
+        and analyzeFinger(2, Finger.PALM, landmark) \
+        and analyzeFinger(3, Finger.PALM, landmark) \
+        and analyzeFinger(4, Finger.STRAIGHT, landmark) \
+        and (right_hand and landmark[12].x > landmark[5].x or left_hand and landmark[12].x < landmark[5].x) \
+        and (landmark[0].y > landmark[5].y and landmark[0].y > landmark[17].y):
+        return "Y" # AND palm facing forwards AND palm not oriented down
+    # Z
+    elif analyzeFinger(1, Finger.STRAIGHT_DOWN, landmark) \
+        and analyzeFinger(2, Finger.BENT_OR_PALM, landmark) \
+        and analyzeFinger(3, Finger.BENT_OR_PALM, landmark) \
+        and analyzeFinger(4, Finger.BENT_OR_PALM, landmark) \
+        and landmark[4].y > landmark[0].y:
+        return "Z" # index finger tip below wrist - overall hand orientation is down ---- TODO: fix confusion with E, add another condition to E for "upright"
+    else:
+        return "?"
+
+
+# random hand: wrist near the bottom of the picture, knuckles spread above it, and every finger a
+# chain of 3 bones, each turned against the previous one by a small (straight) or large (bent) angle.
+# fingers point in any direction, so all letters and most "?" cases are reached
+def randomHand(rng):
+    points = np.zeros((21, 3))
+    wrist = rng.uniform([0.3, 0.5], [0.7, 0.9])
+    heading = rng.normal(-math.pi / 2, 0.8) # direction of the hand, mostly up
+    scale = rng.uniform(0.05, 0.15)
+    points[0, :2] = wrist
+    for finger in range(5):
+        spread = (finger - 2) * 0.35 + rng.normal(0, 0.1)
+        base = wrist + scale * (0.5 if finger == 0 else 1.0) * np.array([math.cos(heading + spread), math.sin(heading + spread)])
+        direction = heading + spread * rng.uniform(0.5, 2) + rng.normal(0, 0.4)
+        points[1 + 4 * finger, :2] = base
+        for joint in range(1, 4):
+            if rng.random() < 0.5:
+                direction += rng.normal(0, 0.2)
+            else:
+                direction += rng.choice([-1, 1]) * rng.uniform(0.6, 2.0)
+            step = scale * rng.uniform(0.2, 0.5)
+            points[1 + 4 * finger + joint, :2] = points[4 * finger + joint, :2] + step * np.array([math.cos(direction), math.sin(direction)])
+    points[:, 2] = rng.normal(0, 0.02, 21)
+    return points.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare the compiled letter rules with the original cascade on random hands")
+    parser.add_argument("--hands", type=int, default=20000, help="random hands to check (each with both handedness labels)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", type=int, default=10, help="mismatches to print")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    letters = Counter()
+    mismatches = 0
+    for n in range(args.hands):
+        points = randomHand(rng)
+        # the reference reads the same float32 values the feature table is built from
+        landmark = [Point(*p) for p in points.tolist()]
+        stacked = classifyHands(np.stack([points, points]), ["Right", "Left"])
+        for (hand_type, fromStack) in zip(["Right", "Left"], stacked):
+            expected = referenceLetter(landmark, hand_type)
+            found = determineLetter(points, hand_type)
+            letters[expected] += 1
+            if found != expected or fromStack != expected:
+                mismatches += 1
+                if mismatches <= args.show:
+                    print("hand %d %s: reference %s, determineLetter %s, classifyHands %s" % (n, hand_type, expected, found, fromStack))
+                    print("  " + repr(points[:, :2].tolist()))
+
+    print("%d hands x 2 handedness labels, %d mismatches" % (args.hands, mismatches))
+    print("reference letters:", " ".join("%s %d" % (letter, count) for (letter, count) in sorted(letters.items())))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import numpy as np
+from enum import Enum
+import math
+
+
+# feature stage shared by the ASL webcam apps:
+#   the 21 MediaPipe landmarks are copied into one (21,3) float32 array per frame,
+#   then every finger angle / straightness / direction flag is computed in one NumPy pass
+#   see https://ai.google.dev/edge/mediapipe/solutions/vision/hand_landmarker for numbering scheme
+
+# helper math functions
+
+def slope(point1, point2):
+    return (point2.y - point1.y) / (point2.x - point1.x)
+
+def angle(point1, point2):
+    return math.atan2(point2.y - point1.y, point2.x - point1.x)
+
+def approx(value, target, range):
+    return (target - range <= value) and (value <= target + range)
+
+def distance(point1, point2):
+    return math.sqrt((point2.y - point1.y) * (point2.y - point1.y) + (point2.x - point1.x) * (point2.x - point1.x))
+
+class Finger(Enum):
+    STRAIGHT = 1
+    ANGLE    = 2
+    UP       = 3
+    DOWN     = 4
+    LEFT     = 5
+    RIGHT    = 6
+    BENT     = 7
+    PALM     = 8
+    STRAIGHT_UP    = 9
+    STRAIGHT_DOWN  = 10
+    STRAIGHT_LEFT  = 11
+    STRAIGHT_RIGHT = 12
+    UP_OR_RIGHT   = 13
+    UP_OR_LEFT    = 14
+    DOWN_OR_RIGHT = 15
+    DOWN_OR_LEFT  = 16
+    HAND_FRONT    = 17
+    BENT_OR_PALM  = 18
+    STRAIGHT_LEFT_OR_RIGHT = 19
+
+
+# finger 0 is thumb, finger 1 is index, etc.
+# reference (one landmark at a time) version, kept for debugging and for checking the vectorized table
+def analyzeFinger(fingerIndex, fingerConfig, landmark):
+
+    # handle array of finger index values
+    if type(fingerIndex) == list:
+        for i in fingerIndex:
+            if not analyzeFinger(i, fingerConfig, landmark):
+                return False
+        return True
+
+    # i: joint index.
+    i = 1 + 4 * fingerIndex
+    if fingerConfig == Finger.STRAIGHT:
+        angle1 = angle(landmark[i+0], landmark[i+1]) + 6.28
+        angle2 = angle(landmark[i+1], landmark[i+2]) + 6.28
+        angle3 = angle(landmark[i+2], landmark[i+3]) + 6.28
+        range = math.radians(30)
+        return (approx(angle1, angle2, range) or approx(angle1 + 2*math.pi, angle2, range) or approx(angle1, angle2 + 2*math.pi, range)) \
+           and (approx(angle2, angle3, range) or approx(angle2 + 2*math.pi, angle3, range) or approx(angle2, angle3 + 2*math.pi, range))
+    # finger tip angle
+    elif fingerConfig == Finger.ANGLE:
+        return angle(landmark[i+2], landmark[i+3])
+    elif fingerConfig == Finger.UP:
+        a = angle(landmark[i+2], landmark[i+3])
+        return -3 * 3.14 / 4 < a and a < -1 * 3.14 / 4
+    elif fingerConfig == Finger.DOWN:
+        a = angle(landmark[i+2], landmark[i+3])
+        return 1 * 3.14 / 4 < a and a < 3 * 3.14 / 4
+    elif fingerConfig == Finger.LEFT:
+        a = angle(landmark[i+2], landmark[i+3])
+        return a < -3 * 3.1415926 / 4 or a > 3 * 3.1415926 / 4
+    elif fingerConfig == Finger.RIGHT:
+        a = angle(landmark[i+2], landmark[i+3])
+        return -1 * 3.14 / 4 < a and a < 1 * 3.14 / 4
+    # assumes hand direction up
+    elif fingerConfig == Finger.BENT:
+        return (landmark[i+3].y > landmark[i+2].y) and (landmark[i+3].y < landmark[i+0].y)
+    # assumes hand direction up
+    elif fingerConfig == Finger.PALM:
+        return landmark[i+3].y > landmark[i+0].y
+    elif fingerConfig == Finger.BENT_OR_PALM: # THIS CAN BE KIND OF MEANINGLESS FROM THE SIDE VIEW - STRAIGHT CAN REGISTER AS PALM IF POINTING SLIGHTLY DOWN
+        return analyzeFinger(fingerIndex, Finger.BENT, landmark) \
+           or analyzeFinger(fingerIndex, Finger.PALM, landmark)
+    elif fingerConfig == Finger.STRAIGHT_UP:
+        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
+           and analyzeFinger(fingerIndex, Finger.UP, landmark)
+    elif fingerConfig == Finger.STRAIGHT_LEFT:
+        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
+           and analyzeFinger(fingerIndex, Finger.LEFT, landmark)
+    elif fingerConfig == Finger.STRAIGHT_DOWN:
+        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
+           and analyzeFinger(fingerIndex, Finger.DOWN, landmark)
+    elif fingerConfig == Finger.STRAIGHT_RIGHT:
+        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
+           and analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
+    elif fingerConfig == Finger.STRAIGHT_LEFT_OR_RIGHT:
+        return analyzeFinger(fingerIndex, Finger.STRAIGHT, landmark) \
+           and (analyzeFinger(fingerIndex, Finger.LEFT, landmark) or analyzeFinger(fingerIndex, Finger.RIGHT, landmark))
+    elif fingerConfig == Finger.UP_OR_LEFT:
+        return analyzeFinger(fingerIndex, Finger.UP, landmark) \
+            or analyzeFinger(fingerIndex, Finger.LEFT, landmark)
+    elif fingerConfig == Finger.UP_OR_RIGHT:
+        return analyzeFinger(fingerIndex, Finger.UP, landmark) \
+            or analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
+    elif fingerConfig == Finger.DOWN_OR_LEFT:
+        return analyzeFinger(fingerIndex, Finger.DOWN, landmark) \
+            or analyzeFinger(fingerIndex, Finger.LEFT, landmark)
+    elif fingerConfig == Finger.DOWN_OR_RIGHT:
+        return analyzeFinger(fingerIndex, Finger.DOWN, landmark) \
+            or analyzeFinger(fingerIndex, Finger.RIGHT, landmark)
+    else:
+        return None
+
+
+# vectorized feature table
+
+# joint indices per finger: row f holds landmarks 1+4f .. 4+4f
+JOINTS = np.arange(1, 21).reshape(5, 4)
+
+# landmark pairs whose (x,y) distance is used by the letter rules
+DISTANCE_PAIRS = [(8,4), (4,3), (4,1), (4,2)]
+DISTANCE_A = np.array([a for (a,b) in DISTANCE_PAIRS])
+DISTANCE_B = np.array([b for (a,b) in DISTANCE_PAIRS])
+
+# copy MediaPipe landmarks (objects with .x .y .z) into a (21,3) float32 array
+def landmarkArray(landmark, out=None):
+    values = [(point.x, point.y, point.z) for point in landmark]
+    if out is None:
+        return np.array(values, np.float32)
+    out[:] = values
+    return out
+
+# order of the rows in the flag table returned by fingerFlags
+FLAG_CONFIGS = [
+    Finger.STRAIGHT,
+    Finger.UP, Finger.DOWN, Finger.LEFT, Finger.RIGHT,
+    Finger.BENT, Finger.PALM,
+    Finger.STRAIGHT_UP, Finger.STRAIGHT_DOWN, Finger.STRAIGHT_LEFT, Finger.STRAIGHT_RIGHT,
+    Finger.UP_OR_LEFT, Finger.DOWN_OR_LEFT,
+    Finger.UP_OR_RIGHT, Finger.DOWN_OR_RIGHT,
+    Finger.BENT_OR_PALM,
+    Finger.STRAIGHT_LEFT_OR_RIGHT,
+]
+
+# tip angle limits for UP, DOWN, (LEFT), RIGHT as open intervals, one row per direction.
+# the LEFT row is a placeholder: LEFT is outside +/- 3/4 pi and is filled in separately
+DIRECTION_LOW  = np.array([-3 * 3.14 / 4, 1 * 3.14 / 4, 0, -1 * 3.14 / 4])[:, None]
+DIRECTION_HIGH = np.array([-1 * 3.14 / 4, 3 * 3.14 / 4, 0,  1 * 3.14 / 4])[:, None]
+LEFT_LIMIT     = 3 * 3.1415926 / 4
+
+# the three "approx" tests of Finger.STRAIGHT: (angle1, angle2), (angle1 + 2pi, angle2), (angle1, angle2 + 2pi)
+WRAP_A = np.array([0, 2*math.pi, 0])[:, None, None]
+WRAP_B = np.array([0, 0, 2*math.pi])[:, None, None]
+STRAIGHT_RANGE = math.radians(30)
+
+# all finger flags in one pass.
+# points: (..., 21, 3) array, so one hand or a stack of hands
+# returns flags: (..., len(FLAG_CONFIGS), 5) bool, one row per config and one column per finger
+#         tip:   (..., 5) finger tip angles (Finger.ANGLE)
+def fingerFlags(points):
+    # float64 so that threshold tests agree with the reference math.atan2 version
+    joints = points[..., JOINTS, :2].astype(np.float64)
+    jy = joints[..., 1]
+
+    # segment angles, (..., 5, 3): base->1, 1->2, 2->tip
+    step = joints[..., 1:, :] - joints[..., :-1, :]
+    segment = np.arctan2(step[..., 1], step[..., 0])
+    tip = segment[..., 2]
+
+    flags = np.empty(points.shape[:-2] + (len(FLAG_CONFIGS), 5), bool)
+
+    # consecutive segments within 30 degrees of each other (also across the +/- pi wrap)
+    shifted = segment + 6.28
+    a = shifted[..., None, :, :2] + WRAP_A
+    b = shifted[..., None, :, 1:] + WRAP_B
+    near = ((b - STRAIGHT_RANGE <= a) & (a <= b + STRAIGHT_RANGE)).any(axis=-3)
+    near.all(axis=-1, out=flags[..., 0, :])
+
+    # up, down, left, right
+    np.logical_and(DIRECTION_LOW < tip[..., None, :], tip[..., None, :] < DIRECTION_HIGH, out=flags[..., 1:5, :])
+    np.logical_or(tip < -LEFT_LIMIT, tip > LEFT_LIMIT, out=flags[..., 3, :])
+
+    # bent, palm (both assume hand direction up)
+    np.logical_and(jy[..., 3] > jy[..., 2], jy[..., 3] < jy[..., 0], out=flags[..., 5, :])
+    np.greater(jy[..., 3], jy[..., 0], out=flags[..., 6, :])
+
+    # combinations
+    np.logical_and(flags[..., 0:1, :], flags[..., 1:5, :], out=flags[..., 7:11, :])
+    np.logical_or(flags[..., 1:3, :], flags[..., 3:4, :], out=flags[..., 11:13, :])
+    np.logical_or(flags[..., 1:3, :], flags[..., 4:5, :], out=flags[..., 13:15, :])
+    np.logical_or(flags[..., 5, :], flags[..., 6, :], out=flags[..., 15, :])
+    np.logical_or(flags[..., 9, :], flags[..., 10, :], out=flags[..., 16, :])
+    return flags, tip
+
+# (x,y) distances for DISTANCE_PAIRS, shape (..., len(DISTANCE_PAIRS))
+def distanceTable(points):
+    offset = points[..., DISTANCE_B, :2].astype(np.float64) - points[..., DISTANCE_A, :2]
+    return np.sqrt((offset * offset).sum(axis=-1))
+
+
+# per-frame feature table for a single hand.
+# the NumPy results are converted to plain lists once, so the letter rules can do cheap scalar lookups
+class HandFeatures:
+
+    # tables: (flags, tip, distances) as lists, if fingerFlags and distanceTable already ran (stackedFeatures)
+    def __init__(self, landmark, tables=None):
+        if isinstance(landmark, np.ndarray):
+            self.points = landmark
+        else:
+            self.points = landmarkArray(landmark)
+        self.x = self.points[:, 0].tolist()
+        self.y = self.points[:, 1].tolist()
+        if tables is None:
+            flags, tip = fingerFlags(self.points)
+            tables = (flags.tolist(), tip.tolist(), distanceTable(self.points).tolist())
+        (flags, tip, distances) = tables
+        self.flags = dict(zip(FLAG_CONFIGS, flags))
+        self.flags[Finger.ANGLE] = tip
+        self.distances = dict(zip(DISTANCE_PAIRS, distances))
+
+    # same meaning as analyzeFinger, read from the table
+    def finger(self, fingerIndex, fingerConfig):
+        values = self.flags[fingerConfig]
+        if type(fingerIndex) == list:
+            for i in fingerIndex:
+                if not values[i]:
+                    return False
+            return True
+        return values[fingerIndex]
+
+    def distance(self, index1, index2):
+        if (index1, index2) in self.distances:
+            return self.distances[(index1, index2)]
+        return self.distances[(index2, index1)]
+
+# HandFeatures for a stack of hands, (n, 21, 3): the NumPy passes run once for all of them,
+# which costs about as much as for a single hand
+def stackedFeatures(points):
+    points = np.asarray(points)
+    if len(points) == 1:
+        return [HandFeatures(points[0])]
+    flags, tip = fingerFlags(points)
+    tables = zip(flags.tolist(), tip.tolist(), distanceTable(points).tolist())
+    return [HandFeatures(hand, table) for (hand, table) in zip(points, tables)]
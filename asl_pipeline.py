@@ -0,0 +1,132 @@
+import threading
+import queue
+import time
+
+
+# pipelined webcam loop for the ASL apps:
+#   capture thread   -> cap.read()
+#   inference thread -> process(frame), e.g. flip + color conversion + hand.process + determineLetter
+#   main thread      -> game logic, drawing and cv2.imshow (OpenCV windows must stay on the main thread)
+# stages are connected by one-slot queues; when a stage falls behind, the waiting frame is
+# replaced by the newer one, so latency stays bounded instead of building up.
+# the main thread displays every captured frame together with the newest finished result,
+# so the display runs at camera rate even when hand tracking is slower.
+# captured frames are only read by the worker stages, never modified.
+# frame arrays are reused: a captured frame goes to both the inference and the display stage,
+# and its array returns to a free list once both are done with it (or it was dropped from their
+# queue); the capture thread reads into a free array instead of allocating a new one.
+
+# put an item, discarding the oldest waiting item if the queue is full.
+# returns the dropped item, or None
+def putLatest(q, item):
+    dropped = None
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                dropped = q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class HandPipeline:
+
+    # cap: cv2.VideoCapture
+    # process: function(frame) -> result, runs on the inference thread
+    # empty: result to report until the first frame has been processed
+    def __init__(self, cap, process, empty=None, queueSize=1):
+        self.cap = cap
+        self.process = process
+        self.frames  = queue.Queue(maxsize=queueSize) # to inference thread
+        self.display = queue.Queue(maxsize=queueSize) # to main thread
+        self.running = threading.Event()
+        self.captureThread   = threading.Thread(target=self.captureLoop, daemon=True)
+        self.inferenceThread = threading.Thread(target=self.inferenceLoop, daemon=True)
+
+        # (newest finished result, capture time of the frame it came from),
+        # replaced as a whole so the main thread never sees a half-updated pair
+        self.latest = (empty, None)
+
+        # frame array reuse: arrays ready for cap.read(), and how many stages still use each frame
+        self.freeFrames = []
+        self.users = {}
+        self.lock = threading.Lock()
+        self.shown = None # frame last returned by readFrame
+
+        # frames skipped by each stage
+        self.droppedInference = 0
+        self.droppedDisplay = 0
+
+    def start(self):
+        self.running.set()
+        self.captureThread.start()
+        self.inferenceThread.start()
+        return self
+
+    # returns once both threads have exited, so the caller can use the capture again.
+    # the capture thread finishes the cap.read() in progress first; the inference thread the
+    # frame in progress (or its 0.1 s wait for one)
+    def stop(self):
+        self.running.clear()
+        self.captureThread.join()
+        self.inferenceThread.join()
+
+    def captureLoop(self):
+        while self.running.is_set():
+            with self.lock:
+                buffer = self.freeFrames.pop() if self.freeFrames else None
+            # note: frames loaded in BGR order
+            success, frame = self.cap.read(buffer)
+            if success:
+                with self.lock:
+                    self.users[id(frame)] = 2
+            item = (success, frame, time.time())
+            dropped = putLatest(self.display, item)
+            if dropped:
+                self.droppedDisplay += 1
+                self.release(dropped[1])
+            if not success:
+                break
+            dropped = putLatest(self.frames, item)
+            if dropped:
+                self.droppedInference += 1
+                self.release(dropped[1])
+
+    # one stage is done with a captured frame
+    def release(self, frame):
+        with self.lock:
+            key = id(frame)
+            if key not in self.users:
+                return
+            self.users[key] -= 1
+            if self.users[key] == 0:
+                del self.users[key]
+                self.freeFrames.append(frame)
+
+    def inferenceLoop(self):
+        while self.running.is_set():
+            try:
+                (success, frame, captureTime) = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.latest = (self.process(frame), captureTime)
+            self.release(frame)
+
+    # next captured frame: (success, frame, captureTime). blocks until the camera delivers one.
+    # the frame is valid until the next readFrame call (then its array is reused): copy it to keep it
+    def readFrame(self, timeout=5.0):
+        if self.shown is not None:
+            self.release(self.shown)
+            self.shown = None
+        try:
+            item = self.display.get(timeout=timeout)
+        except queue.Empty:
+            return (False, None, None)
+        self.shown = item[1]
+        return item
+
+    # newest hand tracking result (may belong to an earlier frame than the one on screen)
+    def latestResult(self):
+        return self.latest[0]
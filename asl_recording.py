@@ -0,0 +1,86 @@
+import numpy as np
+import struct
+import time
+
+
+# compact binary recordings of MediaPipe hand landmark streams
+#
+# file layout (little endian):
+#   header: b"ASLR", version (uint16)
+#   per frame: timestamp (float64), hand count (uint8)
+#     per hand: handedness (uint8: 0 Left, 1 Right, 2 unknown), handedness score (float32),
+#               21 x (x, y, z) landmarks (float32)
+# a frame with no hands still gets a record, so replays keep the original frame count.
+
+MAGIC = b"ASLR"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+FRAME  = struct.Struct("<dB")
+HAND   = struct.Struct("<Bf")
+POINTS_SIZE = 21 * 3 * 4
+
+LABELS = ["Left", "Right"]
+
+def labelCode(label):
+    return LABELS.index(label) if label in LABELS else 2
+
+def labelName(code):
+    return LABELS[code] if code < len(LABELS) else "?"
+
+
+class LandmarkRecorder:
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.frames = 0
+
+    # hands: list of (label, score, points) with points shaped (21,3)
+    def write(self, hands, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        chunks = [FRAME.pack(timestamp, len(hands))]
+        for (label, score, points) in hands:
+            chunks.append(HAND.pack(labelCode(label), score))
+            chunks.append(np.asarray(points, np.float32).reshape(21, 3).tobytes())
+        self.file.write(b"".join(chunks))
+        self.frames += 1
+
+    # record a MediaPipe Hands result (result.multi_hand_landmarks / result.multi_handedness)
+    def add(self, result, timestamp=None):
+        hands = []
+        if result.multi_hand_landmarks:
+            for hand_landmarks, handedness in zip(result.multi_hand_landmarks, result.multi_handedness):
+                classification = handedness.classification[0]
+                points = [(point.x, point.y, point.z) for point in hand_landmarks.landmark]
+                hands.append((classification.label, classification.score, points))
+        self.write(hands, timestamp)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            print("recorded", self.frames, "frames to", self.path)
+
+
+# iterate over a recording: yields (timestamp, [(label, score, points (21,3) float32), ...])
+def readRecording(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    (magic, version) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(path + " is not a landmark recording")
+    if version != VERSION:
+        raise ValueError("unsupported recording version " + str(version))
+    offset = HEADER.size
+    while offset < len(data):
+        (timestamp, count) = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        hands = []
+        for n in range(count):
+            (code, score) = HAND.unpack_from(data, offset)
+            offset += HAND.size
+            points = np.frombuffer(data, np.float32, 21 * 3, offset).reshape(21, 3)
+            offset += POINTS_SIZE
+            hands.append((labelName(code), score, points))
+        yield (timestamp, hands)
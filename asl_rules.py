@@ -0,0 +1,335 @@
+import numpy as np
+import math
+from asl_features import Finger, HandFeatures, stackedFeatures, landmarkArray
+
+
+# letter rules as data.
+#   rules are checked in order; the first rule whose conditions all hold gives the letter.
+#   "all":   conditions for either hand
+#   "right": extra conditions for a right hand (rule never matches a left hand if only "right" is given)
+#   "left":  extra conditions for a left hand
+#
+# condition forms:
+#   ("finger", 0, Finger.UP)              finger 0 (thumb) points up
+#   ("finger", [1,2,3,4], Finger.PALM)    every listed finger is folded against the palm
+#   ("not", condition)
+#   ("all", [condition, ...])
+#   ("x", 4, "<", 6)                      landmark[4].x < landmark[6].x  (also "y", and ">")
+#   ("distance", (8,4), ">", (4,3))       distance(landmark[8], landmark[4]) > distance(landmark[4], landmark[3])
+#   ("spread", 1, 2, ">=", angle)         abs(tip angle 1 - tip angle 2) >= angle  (also "<")
+
+# thumb tip below all finger tips
+THUMB_BELOW_TIPS = ("all", [("y", 4, ">", 8), ("y", 4, ">", 12), ("y", 4, ">", 16), ("y", 4, ">", 20)])
+# wrist below index and pinky knuckles
+HAND_UPRIGHT = ("all", [("y", 0, ">", 5), ("y", 0, ">", 17)])
+
+LETTER_RULES = [
+
+    # the "fist" letters: A, T, N, M, S
+
+    # thumb to correct side of index joint AND palm facing forward (TODO: flat w.r.t. screen?)
+    { "letter":"A",
+      "all":   [("finger", 0, Finger.STRAIGHT_UP), ("finger", [1,2,3,4], Finger.PALM)],
+      "right": [("x", 4, "<", 6), ("x", 12, ">", 5)],
+      "left":  [("x", 4, ">", 6), ("x", 12, "<", 5)] },
+
+    # avoid E confusion AND thumb between correct digits
+    { "letter":"T",
+      "all":   [("finger", 0, Finger.UP), ("y", 4, "<", 16), ("finger", [1,2,3,4], Finger.PALM)],
+      "right": [("x", 6, "<", 4), ("x", 4, "<", 10)],
+      "left":  [("x", 10, "<", 4), ("x", 4, "<", 6)] },
+
+    # thumb faces correct horizontal direction AND tip is past correct digits AND thumb tip is NOT below all fingertips (avoid confusion with E)
+    { "letter":"S",
+      "all":   [("not", THUMB_BELOW_TIPS), ("finger", [1,2,3,4], Finger.PALM)],
+      "right": [("finger", 0, Finger.RIGHT), ("x", 4, ">", 6)],
+      "left":  [("finger", 0, Finger.LEFT), ("x", 4, "<", 6)] },
+
+    # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
+    { "letter":"N",
+      "all":   [("y", 4, "<", 16), ("finger", [1,2,3,4], Finger.PALM), ("y", 5, "<", 0), ("y", 17, "<", 0)],
+      "right": [("x", 10, "<", 4), ("x", 4, "<", 14)],
+      "left":  [("x", 14, "<", 4), ("x", 4, "<", 10)] },
+
+    # avoid E confusion AND thumb between correct digits AND hand oriented upwards (avoid G/N/M confusion)
+    { "letter":"M",
+      "all":   [("y", 4, "<", 16), ("finger", [1,2,3,4], Finger.PALM), ("y", 5, "<", 0), ("y", 17, "<", 0)],
+      "right": [("x", 14, "<", 4)],
+      "left":  [("x", 4, "<", 14)] },
+
+    # thumb tip crosses index finger
+    { "letter":"B",
+      "all":   [("finger", [1,2,3,4], Finger.STRAIGHT_UP)],
+      "right": [("x", 4, ">", 8)],
+      "left":  [("x", 4, "<", 8)] },
+
+    # very much turned to the side AND large+ gap between index tip and thumb tip AND all finger tips above thumb tip
+    # TODO: the DL quadrant, rather than DOWN_OR_LEFT half-plane
+    { "letter":"C",
+      "right": [("finger", [1,2,3,4], Finger.DOWN_OR_LEFT), ("finger", 0, Finger.UP_OR_LEFT), ("x", 20, "<", 5),
+                ("distance", (8,4), ">", (4,3)), ("y", 8, "<", 4), ("y", 20, "<", 4)],
+      "left":  [("finger", [1,2,3,4], Finger.DOWN_OR_RIGHT), ("finger", 0, Finger.UP_OR_RIGHT), ("x", 20, ">", 5),
+                ("distance", (8,4), ">", (4,1)), ("y", 8, "<", 4), ("y", 20, "<", 4)] },
+
+    # thumb tip crosses index finger # LEFT D confused with I
+    { "letter":"D",
+      "all":   [("finger", 1, Finger.STRAIGHT_UP), ("finger", [2,3,4], Finger.PALM)],
+      "right": [("x", 4, ">", 8)],
+      "left":  [("x", 4, "<", 8)] },
+
+    # thumb is below fingertips (avoid T/N/M confusion) AND thumb is correct direction
+    # AND palm facing forward (not turned to *either* side) AND thumb far in towards the palm
+    # AND hand not oriented down
+    # NOTE: requiring all palm, to distinguish from "X".
+    { "letter":"E",
+      "all":   [THUMB_BELOW_TIPS, ("finger", [1,2,3], Finger.PALM), ("finger", 4, Finger.BENT_OR_PALM), HAND_UPRIGHT],
+      "right": [("finger", 0, Finger.RIGHT), ("x", 12, ">", 5), ("x", 12, "<", 13), ("x", 4, ">", 12)],
+      "left":  [("finger", 0, Finger.LEFT), ("x", 12, "<", 5), ("x", 12, ">", 13), ("x", 4, "<", 12)] },
+
+    # no condition on thumb, too restrictive
+    # TODO: add parallel condition on fingers 2/3/4? closeness of 0/1?
+    { "letter":"F",
+      "all":   [("finger", [2,3,4], Finger.STRAIGHT_UP), ("not", ("finger", 1, Finger.STRAIGHT))] },
+
+    # avoid "gun" gesture recognized as "G"
+    { "letter":"G",
+      "all":   [("finger", 1, Finger.STRAIGHT_LEFT_OR_RIGHT), ("not", ("finger", 2, Finger.STRAIGHT)),
+                ("not", ("finger", 3, Finger.STRAIGHT)), ("not", ("finger", 4, Finger.STRAIGHT)), ("y", 4, ">", 8)] },
+
+    # avoid "gun" gesture recognized as "H"
+    # TODO: small angle between fingers, similar to U vs V.... write a "angle_approx" function ????
+    { "letter":"H",
+      "all":   [("finger", [1,2], Finger.STRAIGHT_LEFT_OR_RIGHT), ("not", ("finger", 3, Finger.STRAIGHT)),
+                ("not", ("finger", 4, Finger.STRAIGHT)), ("y", 4, ">", 8)] },
+
+    # thump tip between index and pinky tip
+    { "letter":"I",
+      "all":   [("finger", [1,2,3], Finger.PALM), ("finger", 4, Finger.STRAIGHT_UP)],
+      "right": [("x", 8, "<", 4), ("x", 4, "<", 20)],
+      "left":  [("x", 20, "<", 4), ("x", 4, "<", 8)] },
+
+    # thumb tip is between correct joints AND above joints AND fingers apart at angle (like "V")
+    # TODO: FINGER TIPS NOT CROSSED as in "R" (also do for U, V?)
+    { "letter":"K",
+      "all":   [("y", 4, "<", 5), ("spread", 1, 2, ">=", math.radians(10)),
+                ("finger", [1,2], Finger.STRAIGHT_UP), ("finger", [3,4], Finger.BENT_OR_PALM)],
+      "right": [("x", 5, "<", 4), ("x", 4, "<", 9)],
+      "left":  [("x", 9, "<", 4), ("x", 4, "<", 5)] },
+
+    { "letter":"L",
+      "all":   [("finger", 1, Finger.STRAIGHT_UP), ("finger", [2,3,4], Finger.PALM)],
+      "right": [("finger", 0, Finger.LEFT)],
+      "left":  [("finger", 0, Finger.RIGHT)] },
+
+    # above: M, N
+
+    # very much turned to the side AND *small* gap between index tip and thumb tip
+    # TODO: distinguish from "O"
+    { "letter":"O",
+      "right": [("finger", [1,2,3,4], Finger.DOWN_OR_LEFT), ("finger", 0, Finger.UP_OR_LEFT), ("x", 20, "<", 5),
+                ("distance", (8,4), "<", (4,3))],
+      "left":  [("finger", [1,2,3,4], Finger.DOWN_OR_RIGHT), ("finger", 0, Finger.UP_OR_RIGHT), ("x", 20, ">", 5),
+                ("distance", (8,4), "<", (4,3))] },
+
+    { "letter":"P",
+      "all":   [("finger", 1, Finger.STRAIGHT_LEFT_OR_RIGHT), ("finger", 2, Finger.STRAIGHT_DOWN)] },
+
+    { "letter":"Q",
+      "all":   [("finger", 0, Finger.DOWN), ("finger", 1, Finger.STRAIGHT_DOWN), ("not", ("finger", 2, Finger.STRAIGHT))] },
+
+    # index tip past middle tip AND thumb tip past middle tip
+    { "letter":"R",
+      "all":   [("finger", [3,4], Finger.BENT_OR_PALM)],
+      "right": [("x", 8, ">", 12), ("x", 4, ">", 12)],
+      "left":  [("x", 8, "<", 12), ("x", 4, "<", 12)] },
+
+    # above: S, T
+
+    # thumb tip to the side and below certain joint AND small angle
+    { "letter":"U",
+      "all":   [("y", 4, ">", 5), ("finger", [1,2], Finger.STRAIGHT_UP), ("spread", 1, 2, "<", math.radians(10)),
+                ("finger", [3,4], Finger.BENT_OR_PALM)],
+      "right": [("x", 4, ">", 5)],
+      "left":  [("x", 4, "<", 5)] },
+
+    # thumb tip to the side and below certain joint AND large* angle
+    { "letter":"V",
+      "all":   [("finger", [1,2], Finger.STRAIGHT_UP), ("spread", 1, 2, ">=", math.radians(10)),
+                ("finger", [3,4], Finger.BENT_OR_PALM)],
+      "right": [("x", 4, ">", 5)],
+      "left":  [("x", 4, "<", 5)] },
+
+    { "letter":"W",
+      "all":   [("finger", [1,2,3], Finger.STRAIGHT_UP), ("finger", 4, Finger.BENT_OR_PALM)],
+      "right": [("x", 4, ">", 9)],
+      "left":  [("x", 4, "<", 9)] },
+
+    { "letter":"X",
+      "all":   [("finger", 1, Finger.BENT), ("not", ("finger", 1, Finger.PALM)), ("finger", [2,3,4], Finger.PALM)],
+      "right": [("x", 4, ">", 8)],
+      "left":  [("x", 4, "<", 8)] },
+
+    # AND palm facing forwards AND palm not oriented down
+    { "letter":"Y",
+      "all":   [("finger", 0, Finger.STRAIGHT), ("finger", [1,2,3], Finger.PALM), ("finger", 4, Finger.STRAIGHT), HAND_UPRIGHT],
+      "right": [("x", 12, ">", 5)],
+      "left":  [("x", 12, "<", 5)] },
+
+    # index finger tip below wrist - overall hand orientation is down ---- TODO: fix confusion with E, add another condition to E for "upright"
+    { "letter":"Z",
+      "all":   [("finger", 1, Finger.STRAIGHT_DOWN), ("finger", [2,3,4], Finger.BENT_OR_PALM), ("y", 4, ">", 0)] },
+]
+
+
+# compiling rules into an evaluation plan
+#   every distinct test ("atom") gets one slot, shared by all letters that use it,
+#   so each test is evaluated at most once per frame no matter how many letters refer to it.
+#   a rule is a list of (atom slot, expected value) pairs; the first failing pair rejects the rule.
+
+def atomFunction(key):
+    kind = key[0]
+    if kind == "finger":
+        (_, fingerIndex, fingerConfig) = key
+        return lambda features: features.flags[fingerConfig][fingerIndex]
+    elif kind == "x<":
+        (_, a, b) = key
+        return lambda features: features.x[a] < features.x[b]
+    elif kind == "y<":
+        (_, a, b) = key
+        return lambda features: features.y[a] < features.y[b]
+    elif kind == "distance<":
+        (_, (a1,b1), (a2,b2)) = key
+        return lambda features: features.distance(a1, b1) < features.distance(a2, b2)
+    elif kind == "spread>=":
+        (_, f1, f2, limit) = key
+        return lambda features: abs( features.flags[Finger.ANGLE][f1] - features.flags[Finger.ANGLE][f2] ) >= limit
+    elif kind == "all":
+        parts = [(atomFunction(part), expected) for (part, expected) in key[1]]
+        return lambda features: all(function(features) == expected for (function, expected) in parts)
+    else:
+        raise ValueError("unknown condition: " + str(key))
+
+# condition -> list of (atom key, expected value)
+def expandCondition(condition):
+    kind = condition[0]
+    if kind == "finger":
+        (_, fingerIndex, fingerConfig) = condition
+        if type(fingerIndex) == list:
+            return [(("finger", i, fingerConfig), True) for i in fingerIndex]
+        return [(("finger", fingerIndex, fingerConfig), True)]
+    elif kind == "not":
+        inner = expandCondition(condition[1])
+        if len(inner) == 1:
+            (key, expected) = inner[0]
+            return [(key, not expected)]
+        return [(("all", tuple(inner)), False)]
+    elif kind == "all":
+        return [pair for part in condition[1] for pair in expandCondition(part)]
+    elif kind in ("x", "y"):
+        (axis, a, op, b) = condition
+        if op == "<":
+            return [((axis + "<", a, b), True)]
+        elif op == ">":
+            return [((axis + "<", b, a), True)]
+    elif kind == "distance":
+        (_, pair1, op, pair2) = condition
+        if op == "<":
+            return [(("distance<", pair1, pair2), True)]
+        elif op == ">":
+            return [(("distance<", pair2, pair1), True)]
+    elif kind == "spread":
+        (_, f1, f2, op, limit) = condition
+        if op == ">=":
+            return [(("spread>=", f1, f2, limit), True)]
+        elif op == "<":
+            return [(("spread>=", f1, f2, limit), False)]
+    raise ValueError("unknown condition: " + str(condition))
+
+def compileRules(rules):
+    slots = {}
+    keys = []
+    def slot(key):
+        if key not in slots:
+            slots[key] = len(keys)
+            keys.append(key)
+        return slots[key]
+
+    # per hand type: list of (letter, [(slot, expected), ...])
+    plans = { "Right": [], "Left": [], None: [] }
+    uses = {}
+    for rule in rules:
+        handed = ("right" in rule) or ("left" in rule)
+        for hand_type in plans:
+            if handed and hand_type is None:
+                continue
+            conditions = list(rule.get("all", []))
+            if hand_type == "Right":
+                if handed and "right" not in rule:
+                    continue
+                conditions += rule.get("right", [])
+            elif hand_type == "Left":
+                if handed and "left" not in rule:
+                    continue
+                conditions += rule.get("left", [])
+            checks = []
+            for condition in conditions:
+                for (key, expected) in expandCondition(condition):
+                    pair = (slot(key), expected)
+                    if pair not in checks:
+                        checks.append(pair)
+            plans[hand_type].append((rule["letter"], checks))
+            for (s, expected) in checks:
+                uses[s] = uses.get(s, 0) + 1
+
+    # check widely shared atoms first: they are usually already evaluated by an earlier letter,
+    # so a rule that is going to fail tends to fail on a cached value
+    for hand_type in plans:
+        plans[hand_type] = [ (letter, sorted(checks, key=lambda pair: -uses[pair[0]]))
+                             for (letter, checks) in plans[hand_type] ]
+
+    return { "atoms": [atomFunction(key) for key in keys], "plans": plans }
+
+DEFAULT_PLAN = compileRules(LETTER_RULES)
+
+def classify(features, hand_type, plan=DEFAULT_PLAN):
+    atoms = plan["atoms"]
+    memo = [None] * len(atoms)
+    plans = plan["plans"]
+    for (letter, checks) in plans.get(hand_type, plans[None]):
+        for (s, expected) in checks:
+            value = memo[s]
+            if value is None:
+                value = memo[s] = atoms[s](features)
+            if value != expected:
+                break
+        else:
+            return letter
+    return "?"
+
+def determineLetter(landmark, hand_type, plan=DEFAULT_PLAN):
+    return classify(HandFeatures(landmark), hand_type, plan)
+
+# letters for several hands: the NumPy feature pass (most of the cost) runs once for the whole stack,
+# then every hand goes through the memoized rules. two hands cost little more than one.
+# points: (n, 21, 3) array, hand_types: n handedness labels. returns a list of n letters
+def classifyHands(points, hand_types, plan=DEFAULT_PLAN):
+    return [classify(features, hand_type, plan) for (features, hand_type) in zip(stackedFeatures(points), hand_types)]
+
+# unique key per hand from the handedness labels: "Left", "Right", and "Right 2" if MediaPipe
+# reports the same label twice
+def handKeys(hand_types):
+    keys = []
+    for hand_type in hand_types:
+        key = hand_type
+        count = 1
+        while key in keys:
+            count += 1
+            key = hand_type + " " + str(count)
+        keys.append(key)
+    return keys
+
+# MediaPipe result -> { handedness label: letter } for every detected hand
+def determineLetters(multi_hand_landmarks, multi_handedness, plan=DEFAULT_PLAN):
+    hand_types = [handedness.classification[0].label for handedness in multi_handedness]
+    points = np.stack([landmarkArray(hand_landmarks.landmark) for hand_landmarks in multi_hand_landmarks])
+    return dict(zip(handKeys(hand_types), classifyHands(points, hand_types, plan)))
@@ -0,0 +1,103 @@
+import numpy as np
+from asl_features import landmarkArray
+from asl_rules import classifyHands, handKeys
+from hand_mirror import mirrorResult
+from letter_smoothing import LetterSmoother
+
+
+# hand tracking and letter classification of one webcam frame, shared by asl-game.py and asl-practice.py
+#   the switches are set in the apps and passed in; the per-hand smoothers live here.
+#
+#   tracker = LetterTracker(mp.solutions.hands.Hands(), timer, buffers, multiHand=True, smoothing=True)
+#   (hand_list, letters) = tracker.track(frame)              # mirrored frame (the camera frame with mirrorLandmarks)
+#   pipeline = HandPipeline(cap, tracker.trackCaptured, empty=([], []))
+#
+# stages are timed with timer (see frame_timing.py): motion, color, process, letter.
+
+class LetterTracker:
+
+    # hand: mediapipe Hands, or a RoiHandTracker (see hand_roi.py). timer: FrameTimer. buffers: FrameBuffers
+    # multiHand: classify every detected hand (one feature pass for all hands, see classifyHands),
+    #   otherwise only the first one
+    # smoothing: vote letters over recent frames per hand, skipping classification while a stable
+    #   hand holds still (see letter_smoothing.py)
+    # mirrorLandmarks: frames are tracked as captured, landmarks and handedness are mirrored afterwards
+    #   (see hand_mirror.py)
+    # motionGate: MotionGate, skips tracking of empty still scenes (see motion_gate.py), or None
+    # recorder: LandmarkRecorder that receives every tracking result (see asl_recording.py), or None
+    def __init__(self, hand, timer, buffers, multiHand=False, smoothing=False,
+                 mirrorLandmarks=False, motionGate=None, recorder=None):
+        self.handTracker = hand
+        self.timer = timer
+        self.buffers = buffers
+        self.multiHand = multiHand
+        self.smoothing = smoothing
+        self.mirrorLandmarks = mirrorLandmarks
+        self.motionGate = motionGate
+        self.recorder = recorder
+        self.smoothers = {} # hand key (see handKeys) -> LetterSmoother
+
+    # smoothed letters for the hands in this frame; every other known hand counts this frame as "no letter".
+    # only hands that moved (or are not stable yet) are classified
+    def smoothedLetters(self, points, hand_types, scores):
+        labels = handKeys(hand_types)
+        for label, smoother in self.smoothers.items():
+            if label not in labels:
+                smoother.miss()
+        active = [self.smoothers.setdefault(label, LetterSmoother()) for label in labels]
+        moved = [i for i, smoother in enumerate(active) if not smoother.canSkip(points[i])]
+        fresh = dict(zip(moved, classifyHands(points[moved], [hand_types[i] for i in moved])))
+        for i, smoother in enumerate(active):
+            if i in fresh:
+                smoother.add(fresh[i], scores[i], points[i])
+            else:
+                smoother.add(smoother.letter, scores[i])
+        return [smoother.letter for smoother in active]
+
+    def missAll(self):
+        for smoother in self.smoothers.values():
+            smoother.miss()
+
+    # look for hands in a mirrored frame (the unmirrored camera frame with mirrorLandmarks)
+    # returns (hand_list, letters): the landmarks and letter of each hand, both empty if no hand was found
+    def track(self, frame):
+        timer = self.timer
+        timer.restart()
+        if self.motionGate:
+            if not self.motionGate.check(frame):
+                # empty, still scene
+                self.missAll()
+                return ([], [])
+            timer.mark("motion")
+        RGB_frame = self.buffers.toRGB(frame)
+        timer.mark("color")
+        result = self.handTracker.process(RGB_frame)
+        if self.mirrorLandmarks:
+            mirrorResult(result)
+        if self.motionGate:
+            self.motionGate.handPresent(bool(result.multi_hand_landmarks))
+        timer.mark("process")
+        if self.recorder:
+            self.recorder.add(result)
+        hand_list = []
+        letters = []
+
+        if result.multi_hand_landmarks:
+            hand_list = list(result.multi_hand_landmarks) if self.multiHand else [result.multi_hand_landmarks[0]] # just first hand
+            classifications = [handedness.classification[0] for handedness in result.multi_handedness[:len(hand_list)]]
+            hand_types = [classification.label for classification in classifications] # "Left" or "Right"
+            points = np.stack([landmarkArray(hand_landmarks.landmark) for hand_landmarks in hand_list])
+            if self.smoothing:
+                letters = self.smoothedLetters(points, hand_types, [classification.score for classification in classifications])
+            else:
+                letters = classifyHands(points, hand_types)
+            timer.mark("letter")
+        elif self.smoothing:
+            self.missAll()
+
+        return (hand_list, letters)
+
+    # track() for a frame as captured, e.g. on the inference thread of asl_pipeline.py:
+    # mirrored first, into a buffer of its own, unless the landmarks are mirrored instead
+    def trackCaptured(self, frame):
+        return self.track(frame if self.mirrorLandmarks else self.buffers.flip(frame, "inference flip"))
@@ -0,0 +1,120 @@
+import sys
+import base64
+import binascii
+import argparse
+
+
+# base64 for large files, a chunk at a time
+#   only one chunk of the input and its encoded (or decoded) form are in memory at any moment,
+#   so images of hundreds of megabytes convert with a few hundred kilobytes of memory.
+#   source and target are binary files (open(path, "rb") / open(path, "wb"), io.BytesIO, sys.stdin.buffer)
+#
+#   python base64_stream.py encode image.png image.txt
+#   python base64_stream.py decode image.txt image.png
+#   cat image.txt | python base64_stream.py decode - - > image.png
+#
+# decoding skips whitespace and line breaks, and a "data:image/png;base64," prefix as in HTML and CSS.
+
+CHUNK_SIZE = 3 * 256 * 1024 # a multiple of 3, so every encoded chunk is complete base64 without padding
+
+# returns the number of base64 characters written
+def encodeStream(source, target, chunkSize=CHUNK_SIZE):
+    chunkSize -= chunkSize % 3
+    written = 0
+    carry = b""
+    while True:
+        chunk = source.read(chunkSize)
+        if not chunk:
+            break
+        chunk = carry + chunk
+        # read() may return less than asked (pipes); keep a remainder that is not a multiple of 3
+        cut = len(chunk) - len(chunk) % 3
+        carry = chunk[cut:]
+        encoded = base64.b64encode(chunk[:cut])
+        target.write(encoded)
+        written += len(encoded)
+    if carry:
+        encoded = base64.b64encode(carry)
+        target.write(encoded)
+        written += len(encoded)
+    return written
+
+# returns the number of bytes written; raises binascii.Error for text that is not base64
+def decodeStream(source, target, chunkSize=4 * 256 * 1024):
+    written = 0
+    carry = b""
+    prefix = True # still looking for a data: prefix at the start
+    while True:
+        chunk = source.read(chunkSize)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode("ascii")
+        chunk = carry + b"".join(chunk.split())
+        if prefix:
+            if len(chunk) < 5 or (chunk.startswith(b"data:") and b"," not in chunk):
+                carry = chunk # too short to tell yet
+                continue
+            if chunk.startswith(b"data:"):
+                chunk = chunk[chunk.index(b",") + 1:]
+            prefix = False
+        # decode whole groups of 4 characters, keep the rest for the next chunk
+        cut = len(chunk) - len(chunk) % 4
+        carry = chunk[cut:]
+        decoded = base64.b64decode(chunk[:cut], validate=True)
+        target.write(decoded)
+        written += len(decoded)
+    if prefix and len(carry) % 4 == 0 and not carry.startswith(b"data:"):
+        # very short text, still waiting for the prefix check
+        decoded = base64.b64decode(carry, validate=True)
+        target.write(decoded)
+        written += len(decoded)
+    elif carry:
+        raise binascii.Error("base64 text ends in the middle of a group of 4 characters")
+    return written
+
+# length of the base64 text for this many bytes
+def encodedLength(size):
+    return 4 * ((size + 2) // 3)
+
+# the first characters of the base64 text of a binary file, for showing in a text box; the file
+# position is restored. limit: characters to show
+def encodedPreview(source, limit=2000):
+    position = source.tell()
+    head = source.read(3 * (limit // 4))
+    source.seek(position)
+    return base64.b64encode(head).decode("ascii")
+
+
+def openFile(path, mode):
+    if path == "-":
+        return (sys.stdin.buffer if "r" in mode else sys.stdout.buffer)
+    return open(path, mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="base64 encode or decode a file of any size, a chunk at a time")
+    parser.add_argument("mode", choices=["encode", "decode"])
+    parser.add_argument("input", help="file to read, - for standard input")
+    parser.add_argument("output", help="file to write, - for standard output")
+    args = parser.parse_args()
+
+    source = openFile(args.input, "rb")
+    target = openFile(args.output, "wb")
+    try:
+        if args.mode == "encode":
+            count = encodeStream(source, target)
+        else:
+            count = decodeStream(source, target)
+    except binascii.Error as error:
+        print("%s: not valid base64 (%s)" % (args.input, error), file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout.buffer:
+            target.close()
+    print("%d %s written" % (count, "characters" if args.mode == "encode" else "bytes"), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,106 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
-import base64
 import io
+import os
+import shutil
+import tempfile
+from base64_stream import decodeStream
+
+# characters of base64 text shown in the text box for a loaded file
+PREVIEW_CHARACTERS = 2000
+# decoded images larger than this are kept in a temporary file instead of memory
+SPOOL_SIZE = 64 * 1024 * 1024
+
+# Function to decode base64 from a binary file (a chunk at a time) and show the image;
+# the decoded image is kept for Save Image, so it is only decoded once.
+# returns False (after showing the error) if the text is not base64 or not an image
+def decode_base64(source):
+    global decoded_file, decoded_image
+    image_file = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+    try:
+        decodeStream(source, image_file)
+        image_file.seek(0)
+        image = Image.open(image_file)
+        image.load()
+    except Exception as e:
+        # the temporary file may already be on disk, and the previous image stays loaded
+        image_file.close()
+        messagebox.showerror("Error", f"Failed to convert image: {e}")
+        return False
+    if decoded_file is not None:
+        decoded_file.close()
+    (decoded_file, decoded_image) = (image_file, image)
+    show_preview(image)
+    return True
+
+# Function to show a thumbnail of the decoded image (a smaller copy; the image itself is kept for saving)
+def show_preview(image):
+    scale = min(1.0, 300 / max(image.size))  # Resize for display purposes
+    if scale < 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.BICUBIC, reducing_gap=2.0)
+    img_tk = ImageTk.PhotoImage(image)
+    image_label.config(image=img_tk)
+    image_label.image = img_tk
+    save_button.config(state=tk.NORMAL)
 
 def convert_base64_to_image():
     base64_text = text_box.get("1.0", tk.END).strip()
     try:
-        image_data = base64.b64decode(base64_text)
-        image = Image.open(io.BytesIO(image_data))
-        image.thumbnail((300, 300))  # Resize for display purposes
-
-        img_tk = ImageTk.PhotoImage(image)
-        image_label.config(image=img_tk)
-        image_label.image = img_tk
-        save_button.config(state=tk.NORMAL)
+        # the text box still shows the start of a loaded file, which has been decoded already
+        if decoded_image is not None and base64_text == loaded_text:
+            show_preview(decoded_image)
+            return
+        decode_base64(io.BytesIO(base64_text.encode("ascii")))
     except Exception as e:
         messagebox.showerror("Error", f"Failed to convert image: {e}")
 
-def save_image():
-    base64_text = text_box.get("1.0", tk.END).strip()
+# Function to decode a base64 text file without putting all of its text into the text box
+def load_base64_file():
+    global loaded_text
+    file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+    if not file_path:
+        return
     try:
-        image_data = base64.b64decode(base64_text)
-        image = Image.open(io.BytesIO(image_data))
+        with open(file_path, "rb") as text_file:
+            if not decode_base64(text_file):
+                return
+        with open(file_path, "r") as text_file:
+            head = text_file.read(PREVIEW_CHARACTERS)
+        text_box.delete("1.0", tk.END)
+        text_box.insert(tk.END, head)
+        size = os.path.getsize(file_path)
+        if size > len(head):
+            text_box.insert(tk.END, "\n... (%d characters in all, from %s)" % (size, os.path.basename(file_path)))
+        loaded_text = text_box.get("1.0", tk.END).strip()
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to convert image: {e}")
 
+def save_image():
+    if decoded_image is None:
+        messagebox.showwarning("Warning", "No image to save.")
+        return
+    try:
         file_path = filedialog.asksaveasfilename(defaultextension=".png", 
                                                  filetypes=[("PNG files", "*.png"), ("All files", "*.*")])
         if file_path:
-            image.save(file_path)
+            extension = os.path.splitext(file_path)[1].lower()
+            if Image.registered_extensions().get(extension) == decoded_image.format:
+                # same format: write the decoded file as it is, no new compression
+                decoded_file.seek(0)
+                with open(file_path, "wb") as image_file:
+                    shutil.copyfileobj(decoded_file, image_file)
+            else:
+                decoded_image.save(file_path)
             messagebox.showinfo("Success", f"Image saved to {file_path}")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save image: {e}")
 
+# the last decoded image, its file, and the text box content of the last loaded file
+decoded_file = None
+decoded_image = None
+loaded_text = None
+
 app = tk.Tk()
 app.title("Base64 to Image Converter")
 
@@ -41,6 +110,9 @@ text_box.pack(pady=10)
 convert_button = tk.Button(app, text="Convert to Image", command=convert_base64_to_image)
 convert_button.pack(pady=5)
 
+load_button = tk.Button(app, text="Load Base64 File", command=load_base64_file)
+load_button.pack(pady=5)
+
 image_label = tk.Label(app)
 image_label.pack(pady=10)
 
@@ -0,0 +1,118 @@
+import numpy as np
+import random
+
+
+# state of the falling letter circles in asl-game.py, one NumPy array per property
+# (struct of arrays) so that moving, scoring and missing are a few array operations
+# per frame no matter how many circles there are.
+#
+#   circle i:  x[i], y[i] (pixels, center), speed[i] (pixels per second),
+#              color[i] (index into colors), letter[i] (index into letters), active[i]
+#
+# motion is simulated in fixed time steps (timeStep seconds) with float positions, whatever the
+# frame rate: each update adds the frame time to an accumulator and runs as many steps as fit.
+# drawing interpolates between the last two steps, so circles move smoothly at any frame rate
+# and fall at the same speed on fast and slow machines.
+#
+# letters are dealt from a pool so that the circles on screen show different letters;
+# when the pool is empty (more circles than letters), letters repeat.
+#
+#   field = CircleField(xs, ys, colors, letters, radius=40, speed=60, render=renderCircle)
+#   field.draw(frame)
+#   (scored, missed) = field.update(deltaTime, recognizedLetters, screen_height)
+
+class CircleField:
+
+    # render(color, letter) -> Sprite of one circle, called once per color / letter combination
+    # maxSteps: most steps per update; after a long stall the game slows down instead of jumping
+    def __init__(self, xs, ys, colors, letters, radius, speed, render, timeStep=1/120.0, maxSteps=30):
+        count = len(xs)
+        self.x = np.array(xs, np.int32)
+        self.y = np.array(ys, np.float64)
+        self.previousY = self.y.copy()
+        self.timeStep = timeStep
+        self.maxSteps = maxSteps
+        self.accumulator = 0.0
+        self.blend = 0.0 # fraction of a step between previousY and y, for drawing
+        self.speed = np.full(count, speed, np.float64)
+        self.color = np.arange(count) % len(colors)
+        self.letter = np.zeros(count, np.int32)
+        self.active = np.ones(count, bool)
+        self.colors = colors
+        self.letters = letters
+        self.radius = radius
+        self.render = render
+        self.sprites = {}
+        self.pool = list(range(len(letters)))
+        for i in range(count):
+            self.letter[i] = self.deal()
+
+    def __len__(self):
+        return len(self.x)
+
+    # a letter index from the pool, or any letter if the pool is empty
+    def deal(self):
+        if not self.pool:
+            return random.randrange(len(self.letters))
+        index = random.choice(self.pool)
+        self.pool.remove(index)
+        return index
+
+    def letterName(self, i):
+        return self.letters[self.letter[i]]
+
+    def sprite(self, color, letter):
+        key = (color, letter)
+        if key not in self.sprites:
+            self.sprites[key] = self.render(self.colors[color], self.letters[letter])
+        return self.sprites[key]
+
+    def draw(self, frame):
+        height = frame.shape[0]
+        y = np.rint(self.previousY + self.blend * (self.y - self.previousY)).astype(np.int32)
+        visible = np.flatnonzero(self.active & (y > -2*self.radius) & (y < height + 2*self.radius))
+        for i in visible:
+            sprite = self.sprite(self.color[i], self.letter[i])
+            sprite.blend(frame, self.x[i] - sprite.width//2, y[i] - sprite.height//2)
+
+    # move circle(s) back above the screen, without interpolating the jump
+    def restart(self, indices):
+        self.y[indices] = -2*self.radius
+        self.previousY[indices] = self.y[indices]
+
+    # advance by deltaTime seconds; circles on screen showing one of the recognized letters score,
+    # circles below bottom + radius are missed. both restart above the screen with a new letter.
+    # returns (scored letters, missed letters)
+    def update(self, deltaTime, recognized, bottom):
+        recognizedIndices = [self.letters.index(letter) for letter in recognized if letter in self.letters]
+        scored = np.flatnonzero(self.active & (self.y > self.radius) & np.isin(self.letter, recognizedIndices))
+        scoredLetters = [self.letterName(i) for i in scored]
+        self.restart(scored)
+        self.speed[scored] += 2
+        for i in scored:
+            # the scored letter goes back into the pool after the new one is dealt
+            stored = self.letter[i]
+            self.letter[i] = self.deal()
+            self.pool.append(stored)
+
+        missedLetters = []
+        self.accumulator = min(self.accumulator + deltaTime, self.maxSteps * self.timeStep)
+        while self.accumulator >= self.timeStep:
+            self.accumulator -= self.timeStep
+            missedLetters += self.step(bottom)
+        self.blend = self.accumulator / self.timeStep
+        return (scoredLetters, missedLetters)
+
+    # one fixed time step; returns the missed letters
+    def step(self, bottom):
+        self.previousY[:] = self.y
+        self.y[self.active] += self.speed[self.active] * self.timeStep
+
+        missed = np.flatnonzero(self.active & (self.y > bottom + self.radius))
+        missedLetters = [self.letterName(i) for i in missed]
+        self.restart(missed)
+        # missed letters are taken out of rotation
+        # (to let them appear again, put self.letter[i] back into the pool after dealing)
+        for i in missed:
+            self.letter[i] = self.deal()
+        return missedLetters
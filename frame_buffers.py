@@ -0,0 +1,42 @@
+import numpy as np
+import cv2
+
+
+# reusable frame buffers for the webcam loops
+#   cap.read(), cv2.flip() and cv2.cvtColor() allocate a new full-size array on every call
+#   (about 1.5 MB each at 960x540). all three can write into an existing array instead, so each
+#   stage keeps one named buffer that is reused as long as the frame size stays the same.
+#   a buffer is overwritten by the next call with the same name: keep the names of buffers
+#   used on different threads apart, and copy a frame that has to outlive the loop iteration.
+#
+#   buffers = FrameBuffers()
+#   success, frame = buffers.read(cap)
+#   frame = buffers.flip(frame)
+#   RGB_frame = buffers.toRGB(frame)
+
+class FrameBuffers:
+
+    def __init__(self):
+        self.buffers = {}
+
+    # array with the given shape, the same one as last time if the shape has not changed
+    def get(self, name, shape, dtype=np.uint8):
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+            self.buffers[name] = buffer
+        return buffer
+
+    # cap.read() into the buffer from the previous read (OpenCV allocates a new one if the size changed)
+    def read(self, cap, name="capture"):
+        success, frame = cap.read(self.buffers.get(name))
+        if success:
+            self.buffers[name] = frame
+        return (success, frame)
+
+    # mirror image (reflect across the vertical axis)
+    def flip(self, frame, name="flip"):
+        return cv2.flip(frame, 1, dst=self.get(name, frame.shape))
+
+    def toRGB(self, frame, name="rgb"):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.get(name, frame.shape))
@@ -0,0 +1,166 @@
+import cv2
+import numpy as np
+import threading
+import time
+import json
+import csv
+from collections import deque
+
+
+# per-stage timing for the webcam loops
+#
+#   timer = FrameTimer()
+#   while True:
+#       timer.newFrame()
+#       success, frame = cap.read()
+#       timer.mark("capture")            # time since the previous mark (or frame start)
+#       frame = cv2.flip(frame, 1)
+#       timer.mark("flip")
+#       ...
+#       timer.drawHud(frame)             # toggle with timer.toggleHud()
+#   timer.save("timing.csv")             # or .json
+#
+# every stage keeps a rolling window of recent durations for p50/p95/p99.
+# marks are measured and recorded per thread. the thread that calls newFrame() records its stages
+# in that frame's trace row; a worker thread (see asl_pipeline.py) that calls restart() at the start
+# of each item gets a trace row of its own per item, tagged with its thread name and the index of
+# the frame that was current when the item started, so its stages never land in another frame's row.
+# save() and printSummary() first add the rows that are still open (the last frame, each worker's
+# last item) to the trace; an unfinished frame has no "frame" duration.
+# when disabled, every method returns immediately.
+
+class FrameTimer:
+
+    def __init__(self, enabled=True, window=300, hud=True, hudInterval=15, traceLength=100000):
+        self.enabled = enabled
+        self.window = window
+        self.showHud = hud
+        self.hudInterval = hudInterval
+        self.samples = {}        # stage -> deque of recent durations (ms)
+        self.stages = []         # stage names in first-seen order
+        self.trace = deque(maxlen=traceLength) # one dict per finished frame or worker item (most recent ones)
+        self.frameCount = 0
+        self.local = threading.local() # per thread: last mark, frame start
+        self.open = {}           # thread ident -> record being filled (trace row not finished yet)
+        self.lock = threading.Lock()
+        self.hudLines = []
+
+    # finish the previous frame (if any) and start timing a new one
+    def newFrame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        thread = threading.get_ident()
+        with self.lock:
+            record = self.open.pop(thread, None)
+        frameStart = getattr(self.local, "frameStart", None)
+        if record is not None and frameStart is not None:
+            record["frame"] = (now - frameStart) * 1000
+            self.record("frame", record["frame"])
+            self.trace.append(record)
+        self.frameCount += 1
+        with self.lock:
+            self.open[thread] = { "index": self.frameCount, "time": time.time() }
+        self.local.frameStart = now
+        self.local.last = now
+
+    # reset the mark point of the calling thread (e.g. at the start of work on a worker thread).
+    # on a thread that does not call newFrame() this also finishes the thread's previous item and
+    # starts a new trace row for the marks that follow
+    def restart(self):
+        if not self.enabled:
+            return
+        if getattr(self.local, "frameStart", None) is None:
+            with self.lock:
+                record = self.open.pop(threading.get_ident(), None)
+                if record is not None:
+                    self.trace.append(record)
+                self.open[threading.get_ident()] = { "index": self.frameCount, "thread": threading.current_thread().name, "time": time.time() }
+        self.local.last = time.perf_counter()
+
+    # record the time since this thread's previous mark as stage "name"
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        last = getattr(self.local, "last", None)
+        self.local.last = now
+        if last is None:
+            return
+        duration = (now - last) * 1000
+        self.record(name, duration)
+        record = self.open.get(threading.get_ident())
+        if record is not None:
+            record[name] = record.get(name, 0) + duration
+
+    # add the rows still being filled to the trace (once), e.g. before saving it
+    def finishOpen(self):
+        with self.lock:
+            records = sorted(self.open.values(), key=lambda record: record["time"])
+            self.open.clear()
+        self.trace.extend(records)
+
+    def record(self, name, duration):
+        if name not in self.samples:
+            with self.lock:
+                if name not in self.samples:
+                    self.samples[name] = deque(maxlen=self.window)
+                    self.stages.append(name)
+        self.samples[name].append(duration)
+
+    # stage -> (p50, p95, p99) in milliseconds over the rolling window
+    def percentiles(self):
+        stats = {}
+        for name in list(self.stages):
+            values = np.array(list(self.samples[name]))
+            if len(values) > 0:
+                stats[name] = tuple(np.percentile(values, [50, 95, 99]))
+        return stats
+
+    def fps(self):
+        if "frame" not in self.samples or len(self.samples["frame"]) == 0:
+            return 0.0
+        return 1000.0 / max(np.mean(list(self.samples["frame"])), 1e-6)
+
+    def toggleHud(self):
+        self.showHud = not self.showHud
+
+    # draw fps and per-stage percentiles in the top left corner.
+    # the text is only recomputed every hudInterval frames
+    def drawHud(self, frame):
+        if not self.enabled or not self.showHud:
+            return
+        if self.frameCount % self.hudInterval == 0 or not self.hudLines:
+            self.hudLines = ["%.1f fps   p50 / p95 / p99 ms" % self.fps()]
+            for name, (p50, p95, p99) in self.percentiles().items():
+                self.hudLines.append("%-8s %6.1f %6.1f %6.1f" % (name, p50, p95, p99))
+        for n, line in enumerate(self.hudLines):
+            position = (10, 20 + 18 * n)
+            cv2.putText(frame, line, position, cv2.FONT_HERSHEY_PLAIN, 1, (0,0,0), 3, cv2.LINE_AA)
+            cv2.putText(frame, line, position, cv2.FONT_HERSHEY_PLAIN, 1, (255,255,255), 1, cv2.LINE_AA)
+
+    def printSummary(self):
+        if not self.enabled:
+            return
+        self.finishOpen()
+        print("stage      p50      p95      p99 (ms)")
+        for name, (p50, p95, p99) in self.percentiles().items():
+            print("%-8s %7.2f  %7.2f  %7.2f" % (name, p50, p95, p99))
+
+    # write the per-frame trace: .json (trace plus percentile summary) or anything else as .csv
+    def save(self, path):
+        if not self.enabled:
+            return
+        self.finishOpen()
+        if path.endswith(".json"):
+            summary = { name: { "p50": p50, "p95": p95, "p99": p99 } for name, (p50, p95, p99) in self.percentiles().items() }
+            with open(path, "w") as file:
+                json.dump({ "summary": summary, "frames": list(self.trace) }, file, indent=1)
+        else:
+            columns = ["index", "thread", "time"] + self.stages
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=columns, restval="")
+                writer.writeheader()
+                for row in self.trace:
+                    writer.writerow(row)
+        print("timing trace saved to", path)
@@ -4,6 +4,9 @@ import sys
 import mediapipe as mp
 
 import math
+from frame_timing import FrameTimer
+from frame_buffers import FrameBuffers
+from hand_roi import RoiHandTracker
 
 print("running webcam app")
 
@@ -18,14 +21,30 @@ print("video capture initialized")
 mp_hands = mp.solutions.hands
 hand = mp_hands.Hands()
 
+# region-of-interest tracking: once a hand is found, only a crop around it is processed
+# (full frame again when the hand is lost, see hand_roi.py)
+roiTracking = False
+handTracker = RoiHandTracker(hand, mp_hands.Hands(static_image_mode=True)) if roiTracking else hand
+
 mp_drawing = mp.solutions.drawing_utils
 
 if not cap.isOpened():
     print("Error opening video")
 
+# per-stage timing: set to True for an FPS / latency overlay (H key toggles it)
+# and a per-frame trace saved on exit (see frame_timing.py)
+timing = False
+timer = FrameTimer(enabled=timing)
+
+# reused frame arrays for capture, mirroring and color conversion (see frame_buffers.py)
+buffers = FrameBuffers()
+
 while True:
+    timer.newFrame()
+
     # note: frames loaded in BGR order
-    success, frame = cap.read()
+    success, frame = buffers.read(cap)
+    timer.mark("capture")
     
     if not success:
         cap.release()
@@ -33,9 +52,12 @@ while True:
         sys.exit()
 
     # reflect across axis 0 (x-axis)
-    frame = cv2.flip(frame, 1)
-    RGB_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = hand.process(RGB_frame)
+    frame = buffers.flip(frame)
+    timer.mark("flip")
+    RGB_frame = buffers.toRGB(frame)
+    timer.mark("color")
+    result = handTracker.process(RGB_frame)
+    timer.mark("process")
 
     if result.multi_hand_landmarks:
         for hand_landmarks in result.multi_hand_landmarks:
@@ -48,13 +70,22 @@ while True:
             indexTip = hand0.landmark[8]
             print(thumbTip)
 
-
+    timer.mark("draw")
+    timer.drawHud(frame)
 
     cv2.imshow("press Q to quit", frame)
+    key = cv2.waitKey(1)
+    timer.mark("imshow")
+
+    if key == ord("h"):
+        timer.toggleHud()
 
-    if cv2.waitKey(1) == ord("q"):
+    if key == ord("q"):
         break
 
+timer.printSummary()
+timer.save("hand-tracking-timing.csv")
+
 cap.release()
 cv2.destroyAllWindows()
 
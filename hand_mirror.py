@@ -0,0 +1,27 @@
+# mirroring in landmark space
+#   the ASL apps show and classify the mirrored ("selfie") view. instead of flipping every frame
+#   with cv2.flip(frame, 1) before hand tracking, the unflipped frame can be processed and only
+#   the result mirrored: 21 x values per hand and the handedness label.
+#   (the hand model is not exactly mirror-symmetric, so landmarks differ slightly from those
+#   found in a flipped frame)
+#
+#   result = hand.process(RGB_frame)      # unflipped frame
+#   mirrorResult(result)                  # now as if from cv2.flip(frame, 1)
+
+MIRRORED_LABEL = { "Left": "Right", "Right": "Left" }
+
+# mirror a MediaPipe hands result in place; returns it for convenience
+def mirrorResult(result):
+    if not result.multi_hand_landmarks:
+        return result
+    for hand_landmarks in result.multi_hand_landmarks:
+        for point in hand_landmarks.landmark:
+            point.x = 1.0 - point.x
+    # world landmarks are in meters around the hand center
+    for hand_landmarks in (getattr(result, "multi_hand_world_landmarks", None) or []):
+        for point in hand_landmarks.landmark:
+            point.x = -point.x
+    for handedness in result.multi_handedness:
+        for classification in handedness.classification:
+            classification.label = MIRRORED_LABEL.get(classification.label, classification.label)
+    return result
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+# region-of-interest hand tracking
+#   after a hand has been found, only a padded square around the previous frame's landmarks
+#   is handed to MediaPipe; the landmarks are then mapped back to full-frame coordinates,
+#   so callers see the same result as from hands.process(full_frame).
+#   the full frame is processed again when tracking is lost, and every refreshInterval
+#   frames so that a hand entering elsewhere in the picture is still picked up.
+#
+#   MediaPipe's video mode tracks the hand from one picture to the next, so its Hands object only
+#   ever sees crops, and the crop box stays where it is while the hands are well inside it; the
+#   full frame passes go to a second Hands object in static image mode, which detects from scratch.
+#
+#   tracker = RoiHandTracker(mp_hands.Hands(), mp_hands.Hands(static_image_mode=True))
+#   result = tracker.process(RGB_frame)      # same use as hand.process(RGB_frame)
+
+class RoiHandTracker:
+
+    # hands: a MediaPipe Hands object (video mode), for the crops
+    # detector: a MediaPipe Hands object with static_image_mode=True, for the full frame passes
+    # padding: margin added on every side of the landmark box, as a fraction of the box size
+    # refreshInterval: frames between forced full-frame passes
+    # minSize: smallest crop side, in pixels
+    def __init__(self, hands, detector, padding=0.5, refreshInterval=30, minSize=128):
+        self.hands = hands
+        self.detector = detector
+        self.padding = padding
+        self.refreshInterval = refreshInterval
+        self.minSize = minSize
+        self.box = None          # (x0, y0, x1, y1) in pixels, None when not tracking
+        self.shape = None        # frame size the box belongs to
+        self.sinceRefresh = 0
+
+        # counters, e.g. for a HUD or log
+        self.fullFrames = 0
+        self.cropFrames = 0
+
+    def process(self, frame):
+        self.sinceRefresh += 1
+        # a box from a differently sized frame (e.g. adaptive resolution) is not reused
+        if frame.shape != self.shape:
+            self.box = None
+            self.shape = frame.shape
+        if self.box is not None and self.sinceRefresh < self.refreshInterval:
+            (x0, y0, x1, y1) = self.box
+            result = self.hands.process(np.ascontiguousarray(frame[y0:y1, x0:x1]))
+            if result.multi_hand_landmarks:
+                self.cropFrames += 1
+                self.toFullFrame(result, frame.shape, self.box)
+                self.updateBox(result, frame.shape)
+                return result
+
+        # lost the hand, periodic refresh, or nothing tracked yet
+        self.fullFrames += 1
+        self.sinceRefresh = 0
+        result = self.detector.process(frame)
+        if result.multi_hand_landmarks:
+            self.updateBox(result, frame.shape)
+        else:
+            self.box = None
+        return result
+
+    # keep the current box while every hand is at least half the padding away from its edges and
+    # the box is at most twice the size a new one would have; otherwise move to a new box around the hands
+    def updateBox(self, result, shape):
+        (left, top, right, bottom) = self.bounds(result, shape)
+        if self.box is not None:
+            (x0, y0, x1, y1) = self.box
+            side = x1 - x0
+            margin = side * self.padding / (1 + 2 * self.padding) / 2
+            inside = (left - x0 >= margin and top - y0 >= margin and x1 - right >= margin and y1 - bottom >= margin)
+            needed = max(right - left, bottom - top) * (1 + 2 * self.padding)
+            if inside and max(needed, self.minSize) >= side / 2:
+                return
+        self.box = self.roi(result, shape)
+
+    # map normalized crop coordinates back onto the full frame (in place)
+    def toFullFrame(self, result, shape, box):
+        (height, width) = shape[:2]
+        (x0, y0, x1, y1) = box
+        scaleX = (x1 - x0) / width
+        scaleY = (y1 - y0) / height
+        offsetX = x0 / width
+        offsetY = y0 / height
+        for hand_landmarks in result.multi_hand_landmarks:
+            for point in hand_landmarks.landmark:
+                point.x = offsetX + point.x * scaleX
+                point.y = offsetY + point.y * scaleY
+                # z uses roughly the same scale as x
+                point.z = point.z * scaleX
+
+    # (left, top, right, bottom) in pixels of all detected hands
+    def bounds(self, result, shape):
+        (height, width) = shape[:2]
+        xs = [point.x for hand_landmarks in result.multi_hand_landmarks for point in hand_landmarks.landmark]
+        ys = [point.y for hand_landmarks in result.multi_hand_landmarks for point in hand_landmarks.landmark]
+        return (min(xs) * width, min(ys) * height, max(xs) * width, max(ys) * height)
+
+    # padded square around all detected hands, clipped to the frame
+    def roi(self, result, shape):
+        (height, width) = shape[:2]
+        (left, top, right, bottom) = self.bounds(result, shape)
+        side = max(right - left, bottom - top) * (1 + 2 * self.padding)
+        side = min(max(side, self.minSize), width, height)
+        centerX = (left + right) / 2
+        centerY = (top + bottom) / 2
+        x0 = int(min(max(centerX - side / 2, 0), width - side))
+        y0 = int(min(max(centerY - side / 2, 0), height - side))
+        return (x0, y0, x0 + int(side), y0 + int(side))
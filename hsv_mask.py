@@ -0,0 +1,206 @@
+import numpy as np
+import cv2
+
+
+# HSV threshold overlay for the image mask tools
+#   pixels inside the HSV box (lower..upper, as cv2.inRange) are painted in a solid color.
+#   large photos are thresholded on a small proxy (the display size) while the sliders move;
+#   refine() repeats the threshold at full resolution and scales the result down for display,
+#   so fine detail that the proxy loses shows up once the sliders are still.
+#   all output goes into buffers that are reused between updates.
+#
+#   the number of full resolution pixels inside any HSV box is read from a summed volume table
+#   built once per image (HsvCounts), without looking at the pixels again.
+#
+#   preview = MaskPreview(cv2.imread(path))
+#   display_image(preview.preview(lower, upper))     # fast, while dragging
+#   display_image(preview.refine(lower, upper))      # full resolution, after a pause
+#   preview.counts.fraction(lower, upper)            # share of the image selected
+
+MAGENTA = (255, 0, 255) # BGR
+
+# mask compositing for any image size, into buffers that are kept between calls
+#   bird.py: pixels inside the HSV box are replaced by a color or by another image.
+#   image-load.py: split=True also fills fg (image inside the box, black elsewhere) and bg (the rest).
+#   no inverted mask and no intermediate images; every output is written once per call.
+#   this is the one place that thresholds and composites: the previews (MaskLayer), the batch tool
+#   and the tiled tool all go through it.
+#
+#   compositor = MaskCompositor()
+#   out = compositor.composite(img, (0, 0, 225), (180, 255, 255), (0, 0, 255))
+#   out = compositor.composite(img, lower, upper, backgroundImage, split=True)
+#   out = compositor.composite(img, lower, upper, color, hsv=hsv)       # HSV already converted
+#   compositor.mask, compositor.fg, compositor.bg
+#
+# results are only valid until the next call; copy them to keep them.
+class MaskCompositor:
+
+    def __init__(self):
+        self.shape = None
+        self.hsv = None
+        self.mask = None
+        self.out = None
+        self.fg = None
+        self.bg = None
+        self.color = None
+        self.colorImage = None
+
+    def buffers(self, shape):
+        if shape != self.shape:
+            self.shape = shape
+            self.hsv = None
+            self.mask = np.empty(shape[:2], np.uint8)
+            self.out = np.empty(shape, np.uint8)
+            self.fg = None
+            self.bg = None
+            self.color = None
+
+    # image: BGR. replacement: a BGR color, or a BGR image of the same size
+    # hsv: the image in HSV, if it has been converted already (it is not changed)
+    def composite(self, image, lower, upper, replacement, split=False, hsv=None):
+        self.buffers(image.shape)
+        if hsv is None:
+            if self.hsv is None:
+                self.hsv = np.empty(image.shape, np.uint8)
+            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        cv2.inRange(hsv, np.array(lower), np.array(upper), dst=self.mask)
+
+        if not isinstance(replacement, np.ndarray):
+            if self.color != tuple(replacement):
+                self.color = tuple(replacement)
+                if self.colorImage is None or self.colorImage.shape != image.shape:
+                    self.colorImage = np.empty(image.shape, np.uint8)
+                self.colorImage[:] = self.color
+            replacement = self.colorImage
+        np.copyto(self.out, image)
+        cv2.copyTo(replacement, self.mask, self.out)
+
+        if split:
+            if self.fg is None:
+                self.fg = np.empty(image.shape, np.uint8)
+                self.bg = np.empty(image.shape, np.uint8)
+            self.fg.fill(0)
+            cv2.copyTo(image, self.mask, self.fg)
+            # fg holds either the image pixel or 0, so the difference is exactly the rest
+            cv2.subtract(image, self.fg, dst=self.bg)
+        return self.out
+
+# colors present in an HSV image: 2 x n int32 array of packed colors (h * 65536 + s * 256 + v)
+# and their pixel counts. usually far smaller than the image, and enough to rebuild HsvCounts
+def hsvHistogram(hsv):
+    (h, s, v) = cv2.split(hsv)
+    packed = (h.astype(np.int32) << 16) | (s.astype(np.int32) << 8) | v
+    histogram = np.bincount(packed.ravel(), minlength=180 << 16)
+    colors = np.flatnonzero(histogram)
+    return np.stack([colors, histogram[colors]]).astype(np.int32)
+
+# pixel counts for HSV boxes
+#   table[h, s, v] = number of pixels with hue < h, saturation < s and value < v (a 3D running sum
+#   of the HSV histogram), so any box is 8 table lookups. 181 x 257 x 257 int32, about 48 MB,
+#   so it is rebuilt from an hsvHistogram rather than stored
+class HsvCounts:
+
+    def __init__(self, hsv=None, histogram=None):
+        if histogram is None:
+            histogram = hsvHistogram(hsv)
+        (colors, counts) = histogram
+        self.table = np.zeros((181, 257, 257), np.int32)
+        self.table[(colors >> 16) + 1, ((colors >> 8) & 255) + 1, (colors & 255) + 1] = counts
+        for axis in range(3):
+            np.cumsum(self.table, axis=axis, out=self.table)
+        self.total = int(self.table[-1, -1, -1])
+
+    # pixels that cv2.inRange(hsv, lower, upper) would select
+    def count(self, lower, upper):
+        (h0, s0, v0) = [max(int(bound), 0) for bound in lower]
+        (h1, s1, v1) = [min(int(bound), limit) + 1 for (bound, limit) in zip(upper, (179, 255, 255))]
+        if h0 >= h1 or s0 >= s1 or v0 >= v1:
+            return 0
+        t = self.table
+        return int(t[h1, s1, v1] - t[h0, s1, v1] - t[h1, s0, v1] - t[h1, s1, v0]
+                   + t[h0, s0, v1] + t[h0, s1, v0] + t[h1, s0, v0] - t[h0, s0, v0])
+
+    def fraction(self, lower, upper):
+        return self.count(lower, upper) / self.total
+
+# an image that is thresholded over and over (slider moves): converted to HSV once, composited
+# by its own MaskCompositor
+class MaskLayer:
+
+    def __init__(self, image, color, hsv=None):
+        self.image = image
+        self.color = color
+        self.hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV) if hsv is None else hsv
+        self.compositor = MaskCompositor()
+
+    def apply(self, lower, upper):
+        return self.compositor.composite(self.image, lower, upper, self.color, hsv=self.hsv)
+
+class MaskPreview:
+
+    # image: the full resolution image, or a function that returns it, called on the first refine()
+    #   (then imageSize, its (width, height), counts and proxy are needed)
+    # displaySize: (width, height) of the shown image
+    # counts, proxy, proxyHsv: its HsvCounts, display-sized copy and that copy in HSV, if already known
+    def __init__(self, image, displaySize=(512, 512), color=MAGENTA, counts=None, proxy=None, proxyHsv=None, imageSize=None):
+        self.displaySize = displaySize
+        self.color = color
+        self.hsv = None # full resolution HSV, made for the counts or on the first refine()
+        if callable(image):
+            self.image = None
+            self.loadImage = image
+            self.imageSize = imageSize
+        else:
+            self.image = image
+            self.imageSize = (image.shape[1], image.shape[0])
+            if counts is None:
+                self.hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        self.counts = HsvCounts(self.hsv) if counts is None else counts
+        if proxy is None:
+            proxy = cv2.resize(image, displaySize, interpolation=cv2.INTER_AREA)
+        self.proxy = MaskLayer(proxy, color, proxyHsv)
+        self.full = None # full resolution buffers, made on the first refine()
+        self.display = None
+
+    # True if refine() shows more than preview()
+    def needsRefine(self):
+        (width, height) = self.displaySize
+        return self.imageSize[0] > width or self.imageSize[1] > height
+
+    # overlay on the display-sized proxy
+    def preview(self, lower, upper):
+        return self.proxy.apply(lower, upper)
+
+    # overlay at full resolution (also kept in self.full.compositor.out), scaled down to the display size
+    def refine(self, lower, upper):
+        if not self.needsRefine():
+            return self.preview(lower, upper)
+        if self.full is None:
+            if self.image is None:
+                self.image = self.loadImage()
+            self.full = MaskLayer(self.image, self.color, self.hsv)
+            self.hsv = self.full.hsv
+        result = self.full.apply(lower, upper)
+        self.display = cv2.resize(result, self.displaySize, dst=self.display, interpolation=cv2.INTER_AREA)
+        return self.display
+
+# MaskPreview of an image file, using an ImageCache (see image_cache.py) when the file was opened before.
+# only small things are kept: the display-sized copy, its HSV conversion and the color histogram of
+# the full image (HsvCounts is rebuilt from it). the full image is decoded again on the first refine().
+# None if the file cannot be read
+def cachedPreview(cache, path, displaySize=(512, 512), color=MAGENTA):
+    loaded = []
+    def image():
+        if not loaded:
+            loaded.append(cv2.imread(path))
+        return loaded[0]
+    def load(compute):
+        return lambda: None if image() is None else compute(image())
+
+    proxy = cache.array(path, "proxy-%dx%d" % displaySize, load(lambda full: cv2.resize(full, displaySize, interpolation=cv2.INTER_AREA)))
+    if proxy is None:
+        return None
+    proxyHsv = cache.array(path, "proxy-%dx%d-hsv" % displaySize, lambda: cv2.cvtColor(proxy, cv2.COLOR_BGR2HSV))
+    size = cache.array(path, "size", load(lambda full: np.array([full.shape[1], full.shape[0]])))
+    histogram = cache.array(path, "hsv-histogram", load(lambda full: hsvHistogram(cv2.cvtColor(full, cv2.COLOR_BGR2HSV))))
+    return MaskPreview(image, displaySize, color, HsvCounts(histogram=histogram), proxy, proxyHsv, (int(size[0]), int(size[1])))
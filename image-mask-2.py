@@ -4,31 +4,77 @@ from tkinter import ttk
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
+from hsv_mask import cachedPreview
+from image_cache import ImageCache
+from tk_jobs import LatestJob
+
+# while the sliders move, the threshold is shown on a 512x512 proxy of the image; once they have
+# been still for this many milliseconds, it is recomputed at full resolution (see hsv_mask.py).
+# thresholding runs on a worker thread; slider events that arrive while it is busy are merged
+# into one request with the newest positions (see tk_jobs.py)
+REFINE_DELAY = 250
 
 # Function to load and display the image
 def load_image():
-    global img, hsv_img, img_display
+    global preview, img_display
     file_path = filedialog.askopenfilename()
     if file_path:
-        img = cv2.imread(file_path)
-        img = cv2.resize( img, (512, 512) )
-        hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        apply_hsv_threshold()
+        # decoded image, HSV and pixel count table come from the cache if the file was opened before
+        loaded = cachedPreview(image_cache, file_path, (512, 512))
+        if loaded is not None:
+            preview = loaded
+            apply_hsv_threshold()
 
-# Function to display the image in the Tkinter window
-def display_image(image):
+# Function to convert an image for display (runs on the worker thread; makes a new image,
+# so the threshold buffers can be reused right away)
+def render_image(image):
     img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    img_pil = Image.fromarray(img_rgb)
+    return Image.fromarray(img_rgb)
+
+# Function to display the image in the Tkinter window
+def show_image(img_pil):
     img_tk = ImageTk.PhotoImage(img_pil)
     img_display.config(image=img_tk)
     img_display.image = img_tk
 
+# Function to threshold on the worker thread: params are (preview, full resolution?, lower, upper)
+def run_threshold(params):
+    (image_preview, full, lower_bound, upper_bound) = params
+    if full:
+        return render_image(image_preview.refine(lower_bound, upper_bound))
+    return render_image(image_preview.preview(lower_bound, upper_bound))
+
 # Function to apply the HSV threshold and replace selected pixels with magenta
 def apply_hsv_threshold(*args):
-    global img, hsv_img, img_display
-    if img is None:
+    global refine_job
+    if preview is None:
         return
-    
+
+    (lower_bound, upper_bound) = hsv_bounds()
+    threshold_job.submit((preview, False, lower_bound, upper_bound))
+    show_coverage(lower_bound, upper_bound)
+
+    # restart the wait for the full resolution pass
+    if refine_job is not None:
+        root.after_cancel(refine_job)
+        refine_job = None
+    if preview.needsRefine():
+        refine_job = root.after(REFINE_DELAY, refine_hsv_threshold)
+
+# Function to redo the threshold at full resolution once the sliders are still
+def refine_hsv_threshold():
+    global refine_job
+    refine_job = None
+    (lower_bound, upper_bound) = hsv_bounds()
+    threshold_job.submit((preview, True, lower_bound, upper_bound))
+
+# Function to show how much of the full resolution image is selected (a table lookup, see hsv_mask.py)
+def show_coverage(lower_bound, upper_bound):
+    count = preview.counts.count(lower_bound, upper_bound)
+    coverage_label.config(text="selected: %.1f%% (%d of %d pixels)" % (100.0 * count / preview.counts.total, count, preview.counts.total))
+
+# Function to read the slider positions
+def hsv_bounds():
     lower_h = lower_hue.get()
     lower_s = lower_saturation.get()
     lower_v = lower_value.get()
@@ -38,17 +84,15 @@ def apply_hsv_threshold(*args):
 
     lower_bound = np.array([lower_h, lower_s, lower_v])
     upper_bound = np.array([upper_h, upper_s, upper_v])
-
-    mask = cv2.inRange(hsv_img, lower_bound, upper_bound)
-    img_copy = img.copy()
-    img_copy[mask > 0] = [255, 0, 255]  # Magenta color in BGR
-
-    display_image(img_copy)
+    return (lower_bound, upper_bound)
 
 # Create the main window
 root = tk.Tk()
 root.title("Image HSV Thresholding")
 
+# worker thread for thresholding, newest request only
+threshold_job = LatestJob(root, run_threshold, show_image)
+
 # Create and place the image display label
 img_display = tk.Label(root)
 img_display.grid(row=0, column=0, columnspan=6)
@@ -71,9 +115,14 @@ lower_value.grid(row=2, column=4)
 upper_value = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Upper Value", command=apply_hsv_threshold)
 upper_value.grid(row=2, column=5)
 
-# Initialize the image and hsv_img variables
-img = None
-hsv_img = None
+# Create and place the coverage label
+coverage_label = tk.Label(root, text="")
+coverage_label.grid(row=3, column=0, columnspan=6)
+
+# Initialize the image preview, the pending full resolution pass and the cache of opened images
+preview = None
+refine_job = None
+image_cache = ImageCache()
 
 # Start the main event loop
 root.mainloop()
\ No newline at end of file
@@ -4,27 +4,66 @@ from tkinter import ttk
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
+from hsv_mask import cachedPreview
+from image_cache import ImageCache
+from tk_jobs import LatestJob
 
 # Function to load and display the image
 def load_image():
-    global img, hsv_img, img_display
+    global preview, img_display
     file_path = filedialog.askopenfilename()
-    img = cv2.imread(file_path)
-    img = cv2.resize(img, (512, 512))
-    hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    display_image(img)
+    if not file_path:
+        return
+    # decoded image, HSV and pixel count table come from the cache if the file was opened before
+    loaded = cachedPreview(image_cache, file_path, (512, 512))
+    if loaded is None:
+        return
+    preview = loaded
+    refine_job.cancel()
+    display_image(preview.proxy.image)
+    show_coverage()
 
-# Function to display the image in the Tkinter window
-def display_image(image):
+# Function to convert an image for display (makes a new image, so threshold buffers can be reused)
+def render_image(image):
     img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    img_pil = Image.fromarray(img_rgb)
+    return Image.fromarray(img_rgb)
+
+# Function to show a converted image in the Tkinter window
+def show_image(img_pil):
     img_tk = ImageTk.PhotoImage(img_pil)
     img_display.config(image=img_tk)
     img_display.image = img_tk
 
-# Function to apply the HSV threshold and replace selected pixels with magenta
+# Function to display the image in the Tkinter window
+def display_image(image):
+    show_image(render_image(image))
+
+# Function to threshold at full resolution on the worker thread: params are (preview, lower, upper)
+def run_refine(params):
+    (image_preview, lower_bound, upper_bound) = params
+    return render_image(image_preview.refine(lower_bound, upper_bound))
+
+# Function to apply the HSV threshold and replace selected pixels with magenta: shown on the
+# 512x512 proxy at once, then replaced by the full resolution result from the worker thread
 def apply_hsv_threshold():
-    global img, hsv_img, img_display
+    if preview is None:
+        return
+    (lower_bound, upper_bound) = hsv_bounds()
+    display_image(preview.preview(lower_bound, upper_bound))
+    if preview.needsRefine():
+        refine_job.submit((preview, lower_bound, upper_bound))
+
+# Function to show how much of the image the sliders select; a table lookup (see hsv_mask.py),
+# so it follows the sliders without thresholding the image
+def show_coverage(*args):
+    if preview is None:
+        return
+    (lower_bound, upper_bound) = hsv_bounds()
+    count = preview.counts.count(lower_bound, upper_bound)
+    coverage_label.config(text="selected: %.1f%% (%d of %d pixels)" % (100.0 * count / preview.counts.total, count, preview.counts.total))
+
+# Function to read the slider positions
+def hsv_bounds():
     lower_h = lower_hue.get()
     lower_s = lower_saturation.get()
     lower_v = lower_value.get()
@@ -34,17 +73,15 @@ def apply_hsv_threshold():
 
     lower_bound = np.array([lower_h, lower_s, lower_v])
     upper_bound = np.array([upper_h, upper_s, upper_v])
-
-    mask = cv2.inRange(hsv_img, lower_bound, upper_bound)
-    img_copy = img.copy()
-    img_copy[mask > 0] = [255, 0, 255]  # Magenta color in BGR
-
-    display_image(img_copy)
+    return (lower_bound, upper_bound)
 
 # Create the main window
 root = tk.Tk()
 root.title("Image HSV Thresholding")
 
+# worker thread for the full resolution threshold, newest request only (see tk_jobs.py)
+refine_job = LatestJob(root, run_refine, show_image)
+
 # Create and place the image display label
 img_display = tk.Label(root)
 img_display.grid(row=0, column=0, columnspan=6)
@@ -54,22 +91,30 @@ load_button = tk.Button(root, text="Load Image", command=load_image)
 load_button.grid(row=1, column=0, columnspan=6)
 
 # HSV threshold sliders and labels
-lower_hue = tk.Scale(root, from_=0, to=179, orient="horizontal", label="Lower Hue")
+lower_hue = tk.Scale(root, from_=0, to=179, orient="horizontal", label="Lower Hue", command=show_coverage)
 lower_hue.grid(row=2, column=0)
-upper_hue = tk.Scale(root, from_=0, to=179, orient="horizontal", label="Upper Hue")
+upper_hue = tk.Scale(root, from_=0, to=179, orient="horizontal", label="Upper Hue", command=show_coverage)
 upper_hue.grid(row=2, column=1)
-lower_saturation = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Lower Saturation")
+lower_saturation = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Lower Saturation", command=show_coverage)
 lower_saturation.grid(row=2, column=2)
-upper_saturation = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Upper Saturation")
+upper_saturation = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Upper Saturation", command=show_coverage)
 upper_saturation.grid(row=2, column=3)
-lower_value = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Lower Value")
+lower_value = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Lower Value", command=show_coverage)
 lower_value.grid(row=2, column=4)
-upper_value = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Upper Value")
+upper_value = tk.Scale(root, from_=0, to=255, orient="horizontal", label="Upper Value", command=show_coverage)
 upper_value.grid(row=2, column=5)
 
 # Create and place the apply threshold button
 apply_button = tk.Button(root, text="Apply Threshold", command=apply_hsv_threshold)
 apply_button.grid(row=3, column=0, columnspan=6)
 
+# Create and place the coverage label
+coverage_label = tk.Label(root, text="")
+coverage_label.grid(row=4, column=0, columnspan=6)
+
+# Initialize the image preview and the cache of opened images (see image_cache.py)
+preview = None
+image_cache = ImageCache()
+
 # Start the main event loop
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import shutil
+import hashlib
+import numpy as np
+import cv2
+
+
+# decoded images and things computed from them, kept on disk between runs
+#   every image file gets a cache folder named after its path, modification time and size, so an
+#   edited file gets a new folder and the old one is never read again. arrays are saved as .npy and
+#   memory-mapped (read only) when they are needed again, so reopening a large image costs a few
+#   file opens instead of decoding, resizing and converting it.
+#   meant for resized copies, thumbnails and other small results: caching full resolution images
+#   would fill the cache after a few files and save little over decoding them again.
+#   the cache is limited to maxBytes; when it grows larger, the least recently used folders are deleted.
+#
+#   cache = ImageCache()
+#   small = cache.array(path, "512x512", lambda: cv2.resize(cv2.imread(path), (512, 512)))
+#   thumbnail = cache.array(path, "thumbnail-256", lambda: fitSize(cv2.imread(path), 256))
+
+DEFAULT_FOLDER = os.path.join(os.path.expanduser("~"), ".cache", "opencv-examples")
+
+# image scaled down (never up) to fit into a maxSize x maxSize square
+def fitSize(image, maxSize):
+    (height, width) = image.shape[:2]
+    scale = min(1.0, maxSize / max(height, width))
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+class ImageCache:
+
+    def __init__(self, folder=DEFAULT_FOLDER, maxBytes=2 * 1024 ** 3):
+        self.folder = folder
+        self.maxBytes = maxBytes
+
+    # cache folder for the current version of an image file
+    def entry(self, path):
+        info = os.stat(path)
+        key = "%s|%d|%d" % (os.path.abspath(path), info.st_mtime_ns, info.st_size)
+        return os.path.join(self.folder, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    # saved array if there is one, else compute() (which returns an array, or None to not cache)
+    def array(self, path, name, compute):
+        folder = self.entry(path)
+        file = os.path.join(folder, name + ".npy")
+        if os.path.exists(file):
+            os.utime(folder) # folder time = last use, for eviction
+            try:
+                return np.load(file, mmap_mode="r")
+            except (OSError, ValueError):
+                pass # damaged (e.g. disk was full), compute it again
+        value = compute()
+        if value is not None:
+            self.save(folder, file, value)
+        return value
+
+    def save(self, folder, file, value):
+        try:
+            os.makedirs(folder, exist_ok=True)
+            # write to a temporary name first, so a crash never leaves a half written array behind
+            temporary = "%s.%d.tmp" % (file, os.getpid())
+            with open(temporary, "wb") as output:
+                np.save(output, np.ascontiguousarray(value))
+            os.replace(temporary, file)
+            os.utime(folder)
+        except OSError:
+            return # a full or read only disk only means no caching
+        self.evict(keep=folder)
+
+    def size(self):
+        return sum(size for (used, size, folder) in self.entries())
+
+    # (last use, bytes, folder) for every cached image
+    def entries(self):
+        if not os.path.isdir(self.folder):
+            return []
+        entries = []
+        for name in os.listdir(self.folder):
+            folder = os.path.join(self.folder, name)
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+                entries.append((os.stat(folder).st_mtime, size, folder))
+            except OSError:
+                pass # removed by another process meanwhile
+        return entries
+
+    # delete least recently used images until the cache fits into maxBytes again
+    def evict(self, keep=None):
+        entries = sorted(self.entries())
+        total = sum(size for (used, size, folder) in entries)
+        for (used, size, folder) in entries:
+            if total <= self.maxBytes:
+                break
+            if folder == keep:
+                continue
+            # arrays of this folder that are still mapped stay readable until they are closed
+            shutil.rmtree(folder, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
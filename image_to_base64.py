@@ -1,10 +1,31 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import base64
 from PIL import Image, ImageTk
 import io
+import numpy as np
+from image_cache import ImageCache
+from base64_stream import encodeStream, encodedLength, encodedPreview
+
+# characters of base64 text shown in the text box
+PREVIEW_CHARACTERS = 2000
+
+# Function to open and resize an image; returns its pixels (RGB, RGBA or grayscale, as in the file)
+def resize_image(file_path, width, height):
+    with open(file_path, "rb") as image_file:
+        image = Image.open(image_file)
+        if image.mode not in ("L", "RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.mode or "transparency" in image.info else "RGB")
+        image = image.resize((width, height), Image.LANCZOS)  # Resize image
+        return np.asarray(image)
+
+# Function to make the preview thumbnail of a resized image
+def make_thumbnail(pixels):
+    image = Image.fromarray(pixels)
+    image.thumbnail((300, 300))  # Resize for display purposes
+    return np.asarray(image)
 
 def convert_image_to_base64():
+    global png_data
     file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg;*.gif;*.bmp")])
     if not file_path:
         return
@@ -13,34 +34,36 @@ def convert_image_to_base64():
         width = int(width_entry.get())
         height = int(height_entry.get())
         
-        with open(file_path, "rb") as image_file:
-            image = Image.open(image_file)
-            image = image.resize((width, height), Image.ANTIALIAS)  # Resize image
-            
-            image_data = io.BytesIO()
-            image.save(image_data, format="PNG")
-            image_data = image_data.getvalue()
-            
-            base64_bytes = base64.b64encode(image_data)
-            base64_string = base64_bytes.decode('utf-8')
-
-            base64_text.delete("1.0", tk.END)
-            base64_text.insert(tk.END, base64_string)
-            save_button.config(state=tk.NORMAL)
-            
-            # Display the resized image in a label for preview
-            image = Image.open(io.BytesIO(image_data))
-            image.thumbnail((300, 300))  # Resize for display purposes
-            img_tk = ImageTk.PhotoImage(image)
-            image_label.config(image=img_tk)
-            image_label.image = img_tk
-            
+        # resized image and preview thumbnail come from the cache if this file was converted before
+        resized = image_cache.array(file_path, "resized-%dx%d" % (width, height), lambda: resize_image(file_path, width, height))
+        thumbnail = image_cache.array(file_path, "resized-%dx%d-thumbnail-300" % (width, height), lambda: make_thumbnail(resized))
+        image = Image.fromarray(resized)
+
+        # the PNG is kept; its base64 text is only made when it is saved, a chunk at a time
+        image_data = io.BytesIO()
+        image.save(image_data, format="PNG")
+        png_data = image_data
+
+        # show only the start of the text: a Text widget gets very slow with megabytes in it
+        length = encodedLength(len(image_data.getbuffer()))
+        image_data.seek(0)
+        base64_string = encodedPreview(image_data, PREVIEW_CHARACTERS)
+        base64_text.delete("1.0", tk.END)
+        base64_text.insert(tk.END, base64_string)
+        if length > len(base64_string):
+            base64_text.insert(tk.END, "\n... (%d characters in all; Save Base64 Text writes all of them)" % length)
+        save_button.config(state=tk.NORMAL)
+
+        # Display the resized image in a label for preview
+        img_tk = ImageTk.PhotoImage(Image.fromarray(thumbnail))
+        image_label.config(image=img_tk)
+        image_label.image = img_tk
+
     except Exception as e:
         messagebox.showerror("Error", f"Failed to convert image: {e}")
 
 def save_base64_text():
-    base64_string = base64_text.get("1.0", tk.END).strip()
-    if not base64_string:
+    if png_data is None:
         messagebox.showwarning("Warning", "No base64 text to save.")
         return
     
@@ -48,12 +71,17 @@ def save_base64_text():
         file_path = filedialog.asksaveasfilename(defaultextension=".txt", 
                                                  filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
-            with open(file_path, "w") as text_file:
-                text_file.write(base64_string)
+            png_data.seek(0)
+            with open(file_path, "wb") as text_file:
+                encodeStream(png_data, text_file)
             messagebox.showinfo("Success", f"Base64 text saved to {file_path}")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to save base64 text: {e}")
 
+# Cache of resized images and thumbnails (see image_cache.py), and the PNG of the last converted image
+image_cache = ImageCache()
+png_data = None
+
 # Create the main application window
 app = tk.Tk()
 app.title("Image to Base64 Converter")
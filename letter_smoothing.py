@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# temporal smoothing of determineLetter output, one LetterSmoother per hand
+#   the last `size` letters and their confidences are kept in a ring buffer and weighted-voted:
+#     - a letter becomes the output once it holds `enterShare` of the buffer's votes
+#     - it stays the output while it holds at least `keepShare`
+#     - otherwise the output is "?" (not stable)
+#   single-frame flickers therefore never change the output.
+#   while the output is stable and the landmarks have moved less than `moveThreshold`
+#   (normalized image units) since the last classification, determineLetter can be skipped.
+#
+#   smoother = LetterSmoother()
+#   if smoother.canSkip(points):
+#       letter = smoother.letter
+#   else:
+#       letter = determineLetter(points, hand_type)
+#   smoother.add(letter, score, points)
+#   smoother.letter, smoother.stable
+
+UNKNOWN = "?"
+
+class LetterSmoother:
+
+    def __init__(self, size=8, enterShare=0.6, keepShare=0.4, moveThreshold=0.015):
+        self.size = size
+        self.enterShare = enterShare
+        self.keepShare = keepShare
+        self.moveThreshold = moveThreshold
+        self.codes = { UNKNOWN: 0 }
+        self.names = [UNKNOWN]
+        self.clear()
+
+    def clear(self):
+        self.history = np.zeros(self.size, np.int16)        # letter codes, 0 is "?"
+        self.confidence = np.zeros(self.size, np.float32)
+        self.position = 0
+        self.letter = UNKNOWN
+        self.stable = False
+        self.reference = None
+
+    def code(self, letter):
+        if letter not in self.codes:
+            self.codes[letter] = len(self.names)
+            self.names.append(letter)
+        return self.codes[letter]
+
+    # add one frame's letter; points (21,3) are the landmarks it was classified from
+    # (None when the letter was reused through canSkip)
+    def add(self, letter, confidence=1.0, points=None):
+        self.history[self.position] = self.code(letter)
+        self.confidence[self.position] = confidence
+        self.position = (self.position + 1) % self.size
+
+        votes = np.bincount(self.history, weights=self.confidence, minlength=len(self.names)) / self.size
+        votes[0] = 0 # "?" never wins
+        best = int(np.argmax(votes))
+        current = self.codes[self.letter]
+
+        if votes[best] >= self.enterShare and votes[best] > votes[current]:
+            self.letter = self.names[best]
+        elif votes[current] < self.keepShare:
+            self.letter = UNKNOWN
+        self.stable = self.letter != UNKNOWN
+
+        # only landmarks that classify as the current output may be used to skip classification
+        if points is not None:
+            self.reference = np.array(points[:, :2], np.float32) if self.stable and letter == self.letter else None
+        return self.letter
+
+    # no hand in this frame
+    def miss(self):
+        return self.add(UNKNOWN)
+
+    # True if the output is stable and the hand has hardly moved since it was last classified
+    def canSkip(self, points):
+        if not self.stable or self.reference is None:
+            return False
+        return np.abs(points[:, :2] - self.reference).max() < self.moveThreshold
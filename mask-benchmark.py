@@ -0,0 +1,101 @@
+import numpy as np
+import cv2
+import time
+import tracemalloc
+import argparse
+from hsv_mask import MaskCompositor
+
+
+# time and peak memory of the mask compositing in bird.py and image-load.py,
+# step by step as written there and with hsv_mask.MaskCompositor
+#
+#   python mask-benchmark.py
+#   python mask-benchmark.py --image images/bird.png --repeat 20
+#
+# peak memory: largest amount of new array memory held during one call, measured with tracemalloc
+# (numpy and cv2 results are both numpy arrays). the compositor keeps its buffers between calls;
+# they are listed separately ("kept") and allocated before the measured call.
+
+SIZES = [("512px", (512, 512)), ("4K", (3840, 2160)), ("8K", (7680, 4320))]
+LOWER = (0, 0, 225)
+UPPER = (180, 255, 255)
+RED = (0, 0, 255)
+
+
+# bird.py, step by step
+def birdSteps(img):
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask_orig = cv2.inRange(hsv, LOWER, UPPER)
+    mask_inv = cv2.bitwise_not(mask_orig)
+    postMaskImage = cv2.bitwise_and(img, img, mask=mask_inv)
+    solidColorImage = np.zeros(img.shape, np.uint8)
+    solidColorImage[:] = RED
+    solidColorImageSubset = cv2.bitwise_and(solidColorImage, solidColorImage, mask=mask_orig)
+    return cv2.bitwise_or(postMaskImage, solidColorImageSubset)
+
+# image-load.py, step by step
+def splitSteps(img):
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, LOWER, UPPER)
+    fg = cv2.bitwise_and(img, img, mask=mask)
+    mask_inv = cv2.bitwise_not(mask)
+    bg = cv2.bitwise_and(img, img, mask=mask_inv)
+    return (fg, bg)
+
+def measure(function, repeat):
+    function() # warm up (and let the compositor allocate its buffers)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return (peak, np.median(times))
+
+def keptBytes(compositor):
+    buffers = [compositor.hsv, compositor.mask, compositor.out, compositor.fg, compositor.bg, compositor.colorImage]
+    return sum(buffer.nbytes for buffer in buffers if buffer is not None)
+
+def megabytes(count):
+    return "%8.1f MB" % (count / 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare the mask compositing steps of bird.py and image-load.py with MaskCompositor")
+    parser.add_argument("--image", default="images/bird.png", help="image scaled to each test size")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case (median is shown)")
+    args = parser.parse_args()
+
+    source = cv2.imread(args.image)
+    print("%-6s %-28s %11s %11s %10s %s" % ("size", "method", "peak", "kept", "time", "same result"))
+    for (name, size) in SIZES:
+        img = cv2.resize(source, size)
+        compositor = MaskCompositor()
+        splitter = MaskCompositor()
+
+        expected = birdSteps(img)
+        (expectedFg, expectedBg) = splitSteps(img)
+        compositor.composite(img, LOWER, UPPER, RED)
+        sameBird = np.array_equal(compositor.out, expected)
+        splitter.composite(img, LOWER, UPPER, RED, split=True)
+        sameSplit = np.array_equal(splitter.fg, expectedFg) and np.array_equal(splitter.bg, expectedBg)
+        del expected, expectedFg, expectedBg
+
+        cases = [
+            ("bird.py steps", lambda: birdSteps(img), None, ""),
+            ("MaskCompositor", lambda: compositor.composite(img, LOWER, UPPER, RED), compositor, sameBird),
+            ("image-load.py steps (fg/bg)", lambda: splitSteps(img), None, ""),
+            ("MaskCompositor split=True", lambda: splitter.composite(img, LOWER, UPPER, RED, split=True), splitter, sameSplit),
+        ]
+        for (method, function, kept, same) in cases:
+            (peak, seconds) = measure(function, args.repeat)
+            print("%-6s %-28s %s %s %7.1f ms %s" % (name, method, megabytes(peak),
+                  megabytes(keptBytes(kept)) if kept else "          -", seconds * 1000, same))
+        print()
+
+
+if __name__ == "__main__":
+    main()
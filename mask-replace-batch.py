@@ -0,0 +1,142 @@
+import cv2
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from hsv_mask import MaskCompositor
+
+
+# headless version of bird.py: replace one HSV range with a solid color in every image of a directory
+#
+#   python mask-replace-batch.py images/ --output replaced/
+#   python mask-replace-batch.py photos/ --output out/ --lower 25 50 50 --upper 35 255 255 --color 255 0 0
+#   python mask-replace-batch.py photos/ --output out/ --size 0 0 --format .jpg --workers 8
+#
+# defaults are the bird.py recipe: white (0,0,225)..(180,255,255) becomes red, images resized to 512x512.
+# every worker process reads, masks and writes its own images, so decoding, compositing and encoding
+# of different images run at the same time on all cores. the output folder mirrors the input folders;
+# images whose output already exists are skipped unless --overwrite is given, so a stopped run resumes.
+
+IMAGE_TYPES = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+
+
+# (input path, output path) for every image in the given directories and files
+def collectImages(inputs, outputFolder, extension):
+    items = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                subfolders.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_TYPES):
+                        relative = os.path.relpath(os.path.join(folder, name), path)
+                        items.append((os.path.join(folder, name), os.path.join(outputFolder, relative)))
+        elif path.lower().endswith(IMAGE_TYPES):
+            items.append((path, os.path.join(outputFolder, os.path.basename(path))))
+    if extension:
+        items = [(source, os.path.splitext(target)[0] + extension) for (source, target) in items]
+    return items
+
+
+# worker process state, set once by the pool initializer
+settings = None
+compositor = None # buffers are reused for every image of the same size
+
+def startWorker(workerSettings):
+    global settings, compositor
+    settings = workerSettings
+    compositor = MaskCompositor()
+    cv2.setNumThreads(1) # one image per process; cv2's own threads would only compete with the other workers
+
+# one image -> (input path, status, fraction of pixels replaced)
+def replaceImage(item):
+    (source, target) = item
+    if not settings["overwrite"] and os.path.exists(target):
+        return (source, "skipped", None)
+    image = cv2.imread(source)
+    if image is None:
+        return (source, "unreadable", None)
+    if settings["size"]:
+        image = cv2.resize(image, settings["size"])
+    image = compositor.composite(image, settings["lower"], settings["upper"], settings["color"])
+    mask = compositor.mask
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    params = settings["params"] if target.lower().endswith((".jpg", ".jpeg")) else []
+    # written under a temporary name first: a run stopped in the middle of a write must not leave
+    # a partial image behind that a resumed run would skip as done
+    (base, extension) = os.path.splitext(target)
+    temporary = "%s.%d.tmp%s" % (base, os.getpid(), extension)
+    try:
+        if not cv2.imwrite(temporary, image, params):
+            raise OSError("cannot write " + temporary)
+        os.replace(temporary, target)
+    except (OSError, cv2.error):
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return (source, "unwritable", None)
+    return (source, "done", cv2.countNonZero(mask) / mask.size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replace an HSV color range with a solid color in many images")
+    parser.add_argument("inputs", nargs="+", help="image directories or image files")
+    parser.add_argument("--output", required=True, help="folder for the results (input folders are mirrored below it)")
+    parser.add_argument("--lower", type=int, nargs=3, default=[0, 0, 225], metavar=("H", "S", "V"),
+                        help="lower HSV bound (default: 0 0 225, white as in bird.py)")
+    parser.add_argument("--upper", type=int, nargs=3, default=[180, 255, 255], metavar=("H", "S", "V"),
+                        help="upper HSV bound (default: 180 255 255)")
+    parser.add_argument("--color", type=int, nargs=3, default=[0, 0, 255], metavar=("B", "G", "R"),
+                        help="replacement color (default: 0 0 255, red)")
+    parser.add_argument("--size", type=int, nargs=2, default=[512, 512], metavar=("WIDTH", "HEIGHT"),
+                        help="resize before masking (default: 512 512 as in bird.py; 0 0 keeps the original size)")
+    parser.add_argument("--format", help="output file type, e.g. .png or .jpg (default: same as the input)")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality")
+    parser.add_argument("--overwrite", action="store_true", help="replace existing output images")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=8, help="images handed to a worker at a time")
+    args = parser.parse_args()
+
+    extension = None
+    if args.format:
+        extension = args.format if args.format.startswith(".") else "." + args.format
+    items = collectImages(args.inputs, args.output, extension)
+    if not items:
+        print("no images found")
+        sys.exit(1)
+    settings = {
+        "lower": args.lower,
+        "upper": args.upper,
+        "color": tuple(args.color),
+        "size": tuple(args.size) if all(args.size) else None,
+        "params": [cv2.IMWRITE_JPEG_QUALITY, args.quality],
+        "overwrite": args.overwrite,
+    }
+    print("processing %d images with %d workers" % (len(items), args.workers))
+
+    statuses = {"done": 0, "skipped": 0, "unreadable": 0, "unwritable": 0}
+    replaced = 0.0
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=startWorker, initargs=(settings,)) as pool:
+        # unordered: a large image never holds back the progress of the others
+        for done, (source, status, fraction) in enumerate(pool.imap_unordered(replaceImage, items, args.chunksize), 1):
+            statuses[status] += 1
+            if status == "done":
+                replaced += fraction
+            elif status != "skipped":
+                print("  %s: %s" % (source, status))
+            if done % 500 == 0:
+                elapsed = time.perf_counter() - start
+                print("  %d / %d images, %.0f images/sec" % (done, len(items), done / elapsed))
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("%d images in %.1f s, %.0f images/sec" % (len(items), elapsed, len(items) / elapsed))
+    print(", ".join("%d %s" % (count, status) for status, count in statuses.items() if count))
+    if statuses["done"]:
+        print("%.1f%% of the pixels replaced on average" % (100.0 * replaced / statuses["done"]))
+    print("results saved below", args.output)
+
+
+if __name__ == "__main__":
+    main()
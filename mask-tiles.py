@@ -0,0 +1,65 @@
+import cv2
+import sys
+import time
+import argparse
+from tiled_mask import TiledMask, openImage, createImage, isRGB, overview
+
+
+# full resolution version of bird.py / image-mask.py for images too large to load (gigapixel scans)
+#
+#   python mask-tiles.py scan.npy scan-masked.npy
+#   python mask-tiles.py scan.raw scan-masked.raw --raw-size 60000 40000 --mask scan-mask.raw
+#   python mask-tiles.py scan.tif scan-masked.tif --lower 25 50 50 --upper 35 255 255 --preview overview.png
+#
+# input and output are memory mapped and processed in tiles on all cores (see tiled_mask.py),
+# so memory use stays at a few tiles per thread. .npy and .raw (headerless BGR) need only numpy;
+# uncompressed TIFF needs the tifffile package. other formats (png, jpg) are decoded whole.
+
+def main():
+    parser = argparse.ArgumentParser(description="replace an HSV color range in a very large image, tile by tile")
+    parser.add_argument("input", help="image (.npy, .raw, .tif; png/jpg are loaded whole)")
+    parser.add_argument("output", help="result (.npy, .raw or .tif), written as it is computed")
+    parser.add_argument("--raw-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="size of a .raw input")
+    parser.add_argument("--lower", type=int, nargs=3, default=[0, 0, 225], metavar=("H", "S", "V"),
+                        help="lower HSV bound (default: 0 0 225, white as in bird.py)")
+    parser.add_argument("--upper", type=int, nargs=3, default=[180, 255, 255], metavar=("H", "S", "V"),
+                        help="upper HSV bound (default: 180 255 255)")
+    parser.add_argument("--color", type=int, nargs=3, default=[0, 0, 255], metavar=("B", "G", "R"),
+                        help="replacement color (default: 0 0 255, red)")
+    parser.add_argument("--mask", help="also save the mask (.npy, .raw or .tif)")
+    parser.add_argument("--preview", help="save a reduced copy of the result, e.g. overview.png")
+    parser.add_argument("--tile", type=int, default=1024, help="tile width and height in pixels")
+    parser.add_argument("--workers", type=int, help="threads (default: all cores)")
+    args = parser.parse_args()
+
+    try:
+        source = openImage(args.input, args.raw_size)
+        out = createImage(args.output, source.shape)
+        mask = createImage(args.mask, source.shape[:2]) if args.mask else None
+    except ValueError as error:
+        print(error)
+        sys.exit(1)
+    (height, width) = source.shape[:2]
+    masker = TiledMask(args.lower, args.upper, tuple(args.color), args.tile, args.workers)
+    print("%d x %d pixels, %d tiles, %d threads" % (width, height, len(masker.tiles(height, width)), masker.workers))
+
+    start = time.perf_counter()
+    def progress(done, total, pixels):
+        if done % 100 == 0 or done == total:
+            print("  %d / %d tiles, %.0f megapixels/sec" % (done, total, pixels / 1e6 / (time.perf_counter() - start)))
+    selected = masker.process(source, out, mask, sourceRGB=isRGB(args.input), outRGB=isRGB(args.output), progress=progress)
+    out.flush()
+    if mask is not None:
+        mask.flush()
+    elapsed = time.perf_counter() - start
+
+    print("%.1f megapixels in %.1f s, %.1f%% replaced" % (width * height / 1e6, elapsed, 100.0 * selected / (width * height)))
+    print("result saved to", args.output)
+    if args.preview:
+        small = overview(out)
+        cv2.imwrite(args.preview, cv2.cvtColor(small, cv2.COLOR_RGB2BGR) if isRGB(args.output) else small)
+        print("overview saved to", args.preview)
+
+
+if __name__ == "__main__":
+    main()
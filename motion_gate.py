@@ -0,0 +1,76 @@
+import numpy as np
+import cv2
+
+
+# motion gate in front of hand tracking, for always-on installs
+#   a tiny grayscale copy of each frame is compared to a slowly updated background; hand tracking
+#   only runs while something moves in the picture, while a hand was found in the last tracked
+#   frame (a hand holding a letter still does not move), and for holdFrames after that.
+#   when the scene is empty and still, hand tracking is skipped and the caller may also slow
+#   down its loop (idleWait). the gate reopens on the first frame that shows motion.
+#
+#   gate = MotionGate()
+#   if gate.check(frame):
+#       result = hand.process(RGB_frame)
+#       gate.handPresent(result.multi_hand_landmarks is not None)
+
+class MotionGate:
+
+    # width: width of the comparison image in pixels (height follows the frame's aspect ratio)
+    # threshold: gray level change that counts as motion for one pixel
+    # minFraction: fraction of pixels that must change to count as motion
+    # learnRate: how fast the background follows the picture (lighting changes, furniture moved)
+    # holdFrames: frames to keep tracking after the last motion or hand
+    # idleWait: suggested cv2.waitKey delay in milliseconds while idle
+    def __init__(self, width=64, threshold=20, minFraction=0.003, learnRate=0.05, holdFrames=15, idleWait=100):
+        self.width = width
+        self.threshold = threshold
+        self.minFraction = minFraction
+        self.learnRate = learnRate
+        self.holdFrames = holdFrames
+        self.idleWait = idleWait
+        self.background = None
+        self.shape = None
+        self.sinceActive = holdFrames + 1
+        self.idle = False
+
+        # counters, e.g. for a HUD or log
+        self.activeFrames = 0
+        self.idleFrames = 0
+
+    # True if hand tracking should run on this frame
+    def check(self, frame):
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        # first frame, or a differently sized frame (e.g. adaptive resolution): start a new background
+        if frame.shape != self.shape:
+            self.shape = frame.shape
+            self.background = gray.astype(np.float32)
+            moving = True
+        else:
+            changed = cv2.absdiff(gray, cv2.convertScaleAbs(self.background)) > self.threshold
+            moving = np.count_nonzero(changed) > self.minFraction * changed.size
+            cv2.accumulateWeighted(gray, self.background, self.learnRate)
+
+        if moving:
+            self.sinceActive = 0
+        else:
+            self.sinceActive += 1
+        self.idle = self.sinceActive > self.holdFrames
+        if self.idle:
+            self.idleFrames += 1
+        else:
+            self.activeFrames += 1
+        return not self.idle
+
+    # report whether hand tracking found a hand; keeps the gate open while one is in view
+    def handPresent(self, found):
+        if found:
+            self.sinceActive = 0
+            self.idle = False
+
+    # cv2.waitKey delay for the main loop
+    def waitTime(self, activeWait=1):
+        return self.idleWait if self.idle else activeWait
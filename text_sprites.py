@@ -0,0 +1,95 @@
+import numpy as np
+import cv2
+from collections import OrderedDict
+
+
+# cached text rendering for the webcam overlays
+#   cv2.putText rasterizes the glyph outlines every call; most overlay strings (letters, score,
+#   labels) repeat frame after frame, so each string is rendered once into a color + alpha patch
+#   and afterwards only alpha-blended onto the frame. the least recently used patches are dropped
+#   when more than maxSize strings are cached.
+#
+#   passes are (color, thickness) pairs drawn in order, e.g. a thick black outline and a white fill;
+#   fontThickness is only used to measure the text for centering, as in displayText:
+#   sprites = TextSpriteCache(cv2.FONT_HERSHEY_SIMPLEX, 2, 2, [((0,0,0), 10), ((255,255,255), 4)])
+#   sprites.draw(frame, "A", (100,100))                  # centered on (100,100)
+#   sprites.draw(frame, "A", (100,100), center=False)    # (100,100) is the bottom left, like putText
+
+class TextSpriteCache:
+
+    def __init__(self, fontFamily, fontScale, fontThickness, passes, maxSize=128):
+        self.fontFamily = fontFamily
+        self.fontScale = fontScale
+        self.fontThickness = fontThickness
+        self.passes = passes
+        self.maxSize = maxSize
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # text -> (sprite, (x,y) of the text origin in the sprite, size of the text as from getTextSize)
+    def sprite(self, text):
+        if text in self.sprites:
+            self.hits += 1
+            self.sprites.move_to_end(text)
+            return self.sprites[text]
+        self.misses += 1
+        sprite = self.render(text)
+        self.sprites[text] = sprite
+        if len(self.sprites) > self.maxSize:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def render(self, text):
+        # the thickest pass sets the size; strokes reach half their thickness past the glyphs
+        outline = max(thickness for (color, thickness) in self.passes)
+        (w,h), baseline = cv2.getTextSize(text, self.fontFamily, self.fontScale, outline)
+        pad = outline // 2 + 2
+        origin = (pad, pad + h)
+        color = np.zeros((h + baseline + 2*pad, w + 2*pad, 3), np.uint8)
+        alpha = np.zeros(color.shape[:2], np.uint8)
+        for (passColor, thickness) in self.passes:
+            cv2.putText(color, text, origin, self.fontFamily, self.fontScale, passColor, thickness, cv2.LINE_AA)
+            cv2.putText(alpha, text, origin, self.fontFamily, self.fontScale, 255, thickness, cv2.LINE_AA)
+        textSize = cv2.getTextSize(text, self.fontFamily, self.fontScale, self.fontThickness)[0]
+        return (Sprite(color, alpha), origin, textSize)
+
+    def draw(self, frame, text, position, center=True):
+        (sprite, origin, (w,h)) = self.sprite(text)
+        (x,y) = position
+        if center:
+            (x,y) = (x - int(w/2), y + int(h/2))
+        sprite.blend(frame, x - origin[0], y - origin[1])
+        return frame
+
+
+# an image with per-pixel alpha, ready to blend: color is premultiplied by alpha
+# (drawn onto black), inverse is 255 - alpha repeated over the 3 color channels.
+# sprites whose alpha is only 0 or 255 (shapes drawn without antialiasing) are copied through a mask instead
+class Sprite:
+
+    def __init__(self, color, alpha):
+        self.color = color
+        (self.height, self.width) = alpha.shape
+        if np.isin(alpha, (0, 255)).all():
+            self.mask = alpha
+            self.inverse = None
+        else:
+            self.mask = None
+            self.inverse = cv2.merge([255 - alpha] * 3)
+
+    # blend onto frame with the top left corner at (left, top), clipped to the frame
+    def blend(self, frame, left, top):
+        (height, width) = frame.shape[:2]
+        (x0, y0) = (max(left, 0), max(top, 0))
+        (x1, y1) = (min(left + self.width, width), min(top + self.height, height))
+        if x0 >= x1 or y0 >= y1:
+            return
+        region = frame[y0:y1, x0:x1]
+        part = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+        if self.mask is not None:
+            cv2.copyTo(self.color[part], self.mask[part], region)
+            return
+        # region * (1 - alpha) + color, in place
+        cv2.multiply(region, self.inverse[part], dst=region, scale=1/255.0)
+        cv2.add(region, self.color[part], dst=region)
@@ -0,0 +1,129 @@
+import os
+import threading
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from hsv_mask import MAGENTA, MaskCompositor
+
+
+# HSV masking of very large images at full resolution, in tiles
+#   the image is not loaded: source and result are memory-mapped files (.npy, raw BGR, or
+#   uncompressed TIFF with the optional tifffile package), and each tile is read, converted to HSV,
+#   masked and written back on its own by a pool of threads (cv2 releases the GIL while it works).
+#   memory in use is a few tiles per thread, however large the image; the mapped files only occupy
+#   page cache, which the operating system writes to disk and frees as it goes.
+#
+#   source = openImage("scan.npy")
+#   out = createImage("scan-masked.npy", source.shape)
+#   selected = TiledMask((0, 0, 225), (180, 255, 255), (0, 0, 255)).process(source, out)
+#   out.flush()
+
+RAW_TYPES = (".raw", ".bgr")
+TIFF_TYPES = (".tif", ".tiff")
+
+
+def requireTifffile():
+    try:
+        import tifffile
+    except ImportError:
+        raise SystemExit("memory-mapped TIFF needs the tifffile package (pip install tifffile), or use .npy / .raw files")
+    return tifffile
+
+# memory-mapped image, read only. rawSize (width, height) for headerless BGR files
+# returns an array-like (height, width, 3) uint8 that is read from disk as tiles are used
+def openImage(path, rawSize=None):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        image = np.load(path, mmap_mode="r")
+    elif extension in RAW_TYPES:
+        if rawSize is None:
+            raise ValueError("raw image needs its size (width, height)")
+        (width, height) = rawSize
+        image = np.memmap(path, np.uint8, "r", shape=(height, width, 3))
+    elif extension in TIFF_TYPES:
+        # only uncompressed, contiguous TIFF can be mapped; tifffile raises otherwise
+        image = requireTifffile().memmap(path, mode="r")
+    else:
+        # compressed formats (png, jpg, ...) have to be decoded whole
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError("cannot read " + path)
+    if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+        raise ValueError("%s: expected an 8 bit, 3 channel image, found %s %s" % (path, image.shape, image.dtype))
+    return image
+
+# TIFF stores RGB, everything else here is BGR as in cv2
+def isRGB(path):
+    return os.path.splitext(path)[1].lower() in TIFF_TYPES
+
+# new memory-mapped file for a result of the given shape ((height, width, 3) image or (height, width) mask)
+def createImage(path, shape):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.lib.format.open_memmap(path, "w+", np.uint8, shape)
+    if extension in RAW_TYPES:
+        return np.memmap(path, np.uint8, "w+", shape=shape)
+    if extension in TIFF_TYPES:
+        return requireTifffile().memmap(path, shape=shape, dtype=np.uint8,
+                                        photometric="rgb" if len(shape) == 3 else "minisblack")
+    raise ValueError("results are written as .npy, .raw or .tif files, not " + extension)
+
+# every nth pixel of a (mapped) image, small enough to show or save as png
+def overview(image, maxSize=1024):
+    step = max(1, -(-max(image.shape[:2]) // maxSize))
+    return np.ascontiguousarray(image[::step, ::step])
+
+
+class TiledMask:
+
+    # lower, upper: HSV box as in cv2.inRange. replacement: BGR color, or a BGR image of the full size
+    # tileSize: tile width and height in pixels. workers: threads
+    def __init__(self, lower, upper, replacement=MAGENTA, tileSize=1024, workers=None):
+        self.lower = lower
+        self.upper = upper
+        self.replacement = replacement
+        self.tileSize = tileSize
+        self.workers = workers or os.cpu_count()
+        self.local = threading.local() # one MaskCompositor (and its buffers) per thread
+
+    # (top, bottom, left, right) of every tile, row by row, so the file is written roughly in order
+    def tiles(self, height, width):
+        return [(top, min(top + self.tileSize, height), left, min(left + self.tileSize, width))
+                for top in range(0, height, self.tileSize)
+                for left in range(0, width, self.tileSize)]
+
+    # source: (height, width, 3) array or memory map; out: same shape, receives the result;
+    # mask: optional (height, width) array for the mask itself. sourceRGB, outRGB: RGB instead of BGR (TIFF)
+    # progress(done, total, pixels) is called after every tile, with the number of tiles finished and
+    # their area in pixels (edge tiles are smaller). returns the number of selected pixels
+    def process(self, source, out, mask=None, sourceRGB=False, outRGB=False, progress=None):
+        (height, width) = source.shape[:2]
+        tiles = self.tiles(height, width)
+        lock = threading.Lock()
+        done = [0, 0] # tiles, pixels
+
+        def run(tile):
+            (top, bottom, left, right) = tile
+            if not hasattr(self.local, "compositor"):
+                self.local.compositor = MaskCompositor()
+            compositor = self.local.compositor
+            image = np.ascontiguousarray(source[top:bottom, left:right])
+            if sourceRGB:
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            replacement = self.replacement
+            if isinstance(replacement, np.ndarray):
+                replacement = np.ascontiguousarray(replacement[top:bottom, left:right])
+            result = compositor.composite(image, self.lower, self.upper, replacement)
+            out[top:bottom, left:right] = cv2.cvtColor(result, cv2.COLOR_BGR2RGB) if outRGB else result
+            if mask is not None:
+                mask[top:bottom, left:right] = compositor.mask
+            selected = cv2.countNonZero(compositor.mask)
+            if progress is not None:
+                with lock:
+                    done[0] += 1
+                    done[1] += (bottom - top) * (right - left)
+                    progress(done[0], len(tiles), done[1])
+            return selected
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            return sum(pool.map(run, tiles))
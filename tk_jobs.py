@@ -0,0 +1,92 @@
+import threading
+import traceback
+
+
+# slow work for a Tk window, run on a worker thread, newest request only
+#   submit(params) can be called for every slider event. requests that arrive while the worker
+#   is busy replace each other, so at most one is waiting. every finished result that is newer
+#   than the one on screen reaches publish(result), even if newer requests are already waiting,
+#   so the window keeps updating while a slider is dragged; only results older than the one
+#   shown (or than a cancel()) are dropped. publish runs on the Tk thread (Tk widgets must only be touched from there), polled with
+#   root.after while work is outstanding. the Tk main loop never waits for the work itself.
+#
+#   job = LatestJob(root, work, publish)
+#   scale = tk.Scale(root, ..., command=lambda value: job.submit(read_sliders()))
+#
+# work(params) runs on the worker thread: it must not touch Tk widgets, and its result should
+# not share buffers that the next work() call overwrites.
+
+class LatestJob:
+
+    def __init__(self, root, work, publish, pollInterval=10):
+        self.root = root
+        self.work = work
+        self.publish = publish
+        self.pollInterval = pollInterval
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.generation = 0    # number of the newest request
+        self.pending = None    # (generation, params) waiting for the worker
+        self.working = False
+        self.result = None     # (generation, result) waiting for publish
+        self.shown = 0         # generation of the result on screen (or of the last cancel)
+        self.polling = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # request work with these parameters; replaces any request that has not started yet
+    def submit(self, params):
+        with self.lock:
+            self.generation += 1
+            self.pending = (self.generation, params)
+            self.wake.notify()
+        self.startPolling()
+
+    # drop the waiting request, and the result of the one running now
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            self.pending = None
+            self.result = None
+            self.shown = self.generation
+
+    def run(self):
+        while True:
+            with self.lock:
+                while self.pending is None:
+                    self.wake.wait()
+                (generation, params) = self.pending
+                self.pending = None
+                self.working = True
+            try:
+                result = self.work(params)
+            except Exception:
+                traceback.print_exc()
+                generation = None
+            with self.lock:
+                self.working = False
+                if generation is not None and generation > self.shown and (self.result is None or generation > self.result[0]):
+                    self.result = (generation, result)
+
+    # Tk thread: publish a finished result, keep polling while work is outstanding
+    def startPolling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.pollInterval, self.poll)
+
+    def poll(self):
+        with self.lock:
+            ready = self.result
+            self.result = None
+            if ready is not None:
+                if ready[0] <= self.shown:
+                    ready = None
+                else:
+                    self.shown = ready[0]
+            busy = self.working or self.pending is not None
+        if ready is not None:
+            self.publish(ready[1])
+        if busy:
+            self.root.after(self.pollInterval, self.poll)
+        else:
+            self.polling = False
@@ -2,6 +2,8 @@ import numpy as np
 import cv2
 import sys
 import time
+from frame_timing import FrameTimer
+from frame_buffers import FrameBuffers
 
 print("running webcam app")
 
@@ -13,8 +15,18 @@ print("video capture initialized")
 if not cap.isOpened():
     print("Error opening video")
 
+# per-stage timing: set to True for an FPS / latency overlay (H key toggles it)
+# and a per-frame trace saved on exit (see frame_timing.py)
+timing = False
+timer = FrameTimer(enabled=timing)
+
+# reused frame arrays for capture, mirroring and color conversion (see frame_buffers.py)
+buffers = FrameBuffers()
+
 while True:
-    success, frame = cap.read()
+    timer.newFrame()
+    success, frame = buffers.read(cap)
+    timer.mark("capture")
     
     if not success:
         cap.release()
@@ -22,12 +34,23 @@ while True:
         sys.exit()
 
     # reflect (like a mirror)
-    frame = cv2.flip(frame, 1) 
+    frame = buffers.flip(frame)
+    timer.mark("flip")
+    timer.drawHud(frame)
+
     cv2.imshow("press Q to quit", frame)
+    key = cv2.waitKey(1)
+    timer.mark("imshow")
 
-    if cv2.waitKey(1) == ord("q"):
+    if key == ord("h"):
+        timer.toggleHud()
+
+    if key == ord("q"):
         break
 
+timer.printSummary()
+timer.save("webcam-display-timing.csv")
+
 cap.release()
 cv2.destroyAllWindows()
 